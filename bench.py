@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the scraper pipeline."""
+
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+
+async def bench_extraction(url, iterations):
+    """Compare the HTML extraction path against in-browser extraction."""
+    from playwright.async_api import async_playwright
+    from scraper.core import Scraper
+    from scraper.dom_extractor import extract_in_page
+    from scraper.extractor import Extractor
+    from scraper.selector_manager import get_valid_auction_selectors
+
+    scraper = Scraper(url)
+    custom = scraper.custom_selectors.get("auction_items")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        try:
+            await scraper._prepare_page(page)
+
+            html_times, dom_times = [], []
+            html_bytes = dom_bytes = 0
+            html_items = dom_items = 0
+            for _ in range(iterations):
+                t0 = perf_counter()
+                html = await page.content()
+                selectors = get_valid_auction_selectors(html, custom)
+                data = await Extractor(html, scraper.url, {"auction_items": selectors}).extract()
+                html_times.append(perf_counter() - t0)
+                html_bytes, html_items = len(html.encode("utf-8")), len(data["auction_data"])
+
+                t0 = perf_counter()
+                data = await extract_in_page(page, scraper.url, {"auction_items": custom})
+                dom_times.append(perf_counter() - t0)
+                dom_bytes, dom_items = len(json.dumps(data).encode("utf-8")), len(data["auction_data"])
+        finally:
+            await browser.close()
+
+    for name, times, size, items in (
+        ("html", html_times, html_bytes, html_items),
+        ("dom", dom_times, dom_bytes, dom_items),
+    ):
+        print(f"{name:5} best={min(times) * 1000:8.1f}ms  "
+              f"mean={sum(times) / len(times) * 1000:8.1f}ms  "
+              f"transfer={size:>10,}B  items={items}")
+
+
+def bench_normalize(count, iterations):
+    """Time batch normalization of synthetic lots."""
+    import random
+    from scraper.normalize import normalize_lots
+
+    rng = random.Random(0)
+    closing = [f"Ends Jun {d} {h}:00 PM" for d in range(10, 20) for h in range(1, 12)]
+    items = [{
+        "title": f"Lot {i}",
+        "price": f"${rng.randint(1, 5000):,}.{rng.randint(0, 99):02d}",
+        "end_time": f"{rng.randint(0, 6)}d {rng.randint(0, 23)}h {rng.randint(0, 59)}m"
+                    if i % 2 else rng.choice(closing),
+        "image_url": f"https://example.com/img/{i}.jpg",
+        "item_url": f"https://example.com/lot/{i}"
+    } for i in range(count)]
+
+    times = []
+    for _ in range(iterations):
+        t0 = perf_counter()
+        normalize_lots(items, "bench.example").records()
+        times.append(perf_counter() - t0)
+    best = min(times)
+    print(f"normalize {count:,} lots  best={best * 1000:.1f}ms  rate={count / best:,.0f} lots/sec")
+
+
+async def bench_replay(domain, url, limit, iterations):
+    """Re-run extraction over archived HTML snapshots, fully offline."""
+    from scraper.archive import Archive, replay
+    from scraper.config_manager import get_config_for_domain
+
+    archive = Archive(domain)
+    snapshots = archive.find(url, limit=limit)
+    if not snapshots:
+        print(f"No archived HTML for {url or domain}")
+        return
+    config = get_config_for_domain(snapshots[0].url)
+    custom = config.get("custom_selectors", {})
+
+    times, items = [], 0
+    for _ in range(iterations):
+        t0 = perf_counter()
+        items = 0
+        for snapshot in snapshots:
+            data = await replay(archive, snapshot, custom, config.get("structured_data", True))
+            items += len(data["auction_data"])
+        times.append(perf_counter() - t0)
+    best = min(times)
+    print(f"replay {len(snapshots)} snapshots  best={best * 1000:.1f}ms  "
+          f"rate={len(snapshots) / best:,.1f} pages/sec  items={items}")
+    print(f"archive {json.dumps(archive.stats())}")
+
+
+# Wall-clock budgets (ms, best of N, interpreter startup included) checked by `bench.py imports`
+IMPORT_BUDGETS = {
+    "launch.py --help": 150,
+    "worker spawn": 450,
+}
+
+
+def _wall_ms(argv, iterations):
+    import statistics
+    import subprocess
+
+    times = []
+    for _ in range(iterations):
+        t0 = perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        times.append((perf_counter() - t0) * 1000)
+    return min(times), statistics.median(times)
+
+
+def _slowest_imports(module, top):
+    """Modules with the largest self import time when importing ``module``."""
+    import subprocess
+
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if self_us.isdigit():
+            rows.append((int(self_us), int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def bench_imports(iterations, top):
+    """Time cold imports and CLI startup in fresh interpreters, against IMPORT_BUDGETS."""
+    cases = [
+        ("python startup", [sys.executable, "-c", "pass"]),
+        ("import scraper", [sys.executable, "-c", "import scraper"]),
+        ("launch.py --help", [sys.executable, "launch.py", "--help"]),
+        ("worker spawn", [sys.executable, "-c", "from scraper.core import Scraper"]),
+        ("import utils.ai_assist", [sys.executable, "-c", "import utils.ai_assist"]),
+    ]
+    over = []
+    for name, argv in cases:
+        best, median = _wall_ms(argv, iterations)
+        budget = IMPORT_BUDGETS.get(name)
+        verdict = ""
+        if budget is not None:
+            verdict = f"budget={budget}ms {'ok' if best <= budget else 'OVER'}"
+            if best > budget:
+                over.append(name)
+        print(f"{name:24} best={best:7.1f}ms  median={median:7.1f}ms  {verdict}")
+
+    if top:
+        print("\nslowest imports under scraper.core (self time):")
+        for self_us, cumulative_us, name in _slowest_imports("scraper.core", top):
+            print(f"  {self_us / 1000:7.1f}ms  (cumulative {cumulative_us / 1000:7.1f}ms)  {name}")
+    return 1 if over else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    extraction = sub.add_parser("extraction", help="HTML path vs in-browser extraction")
+    extraction.add_argument("url")
+    extraction.add_argument("-n", "--iterations", type=int, default=5)
+
+    normalize = sub.add_parser("normalize", help="batch price/end-time normalization")
+    normalize.add_argument("-c", "--count", type=int, default=100000)
+    normalize.add_argument("-n", "--iterations", type=int, default=5)
+
+    replay = sub.add_parser("replay", help="extraction over archived HTML snapshots")
+    replay.add_argument("domain")
+    replay.add_argument("--url", help="only snapshots of this page URL")
+    replay.add_argument("-l", "--limit", type=int, default=50, help="newest N snapshots")
+    replay.add_argument("-n", "--iterations", type=int, default=3)
+
+    imports = sub.add_parser("imports", help="cold import / CLI startup time against budgets")
+    imports.add_argument("-n", "--iterations", type=int, default=5)
+    imports.add_argument("--top", type=int, default=10, help="show the N slowest imports (0 to skip)")
+
+    args = parser.parse_args()
+    if args.command == "extraction":
+        asyncio.run(bench_extraction(args.url, args.iterations))
+    elif args.command == "normalize":
+        bench_normalize(args.count, args.iterations)
+    elif args.command == "imports":
+        return bench_imports(args.iterations, args.top)
+    elif args.command == "replay":
+        asyncio.run(bench_replay(args.domain, args.url, args.limit, args.iterations))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
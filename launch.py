@@ -1,22 +1,59 @@
 #!/usr/bin/env python3
 
 import sys
-import asyncio
-from scraper.core import Scraper
+import argparse
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 launch.py <url>")
-        sys.exit(1)
-        
-    url = sys.argv[1]
-    scraper = Scraper(url)
-    
+    parser = argparse.ArgumentParser(description="Scrape a URL.")
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--crawl", action="store_true",
+                        help="also scrape the listing pages that follow the URL")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="stop crawling after this many pages")
+    parser.add_argument("--drain-retries", action="store_true",
+                        help="after the scrape, run queued retries for the domain as they come due")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="concurrent workers used to drain retries or run service jobs")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a long-lived service that takes jobs over a local HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="service bind address")
+    parser.add_argument("--port", type=int, default=8700, help="service port")
+    parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--browsers", type=int, default=4,
+                        help="browser contexts the service keeps open at once")
+    parser.add_argument("--drain-timeout", type=float, default=None,
+                        help="seconds to wait for in-flight jobs on shutdown")
+    args = parser.parse_args()
+
+    # Heavy imports (asyncio included) wait until arguments are parsed so --help stays fast
+    import asyncio
+
+    if args.serve:
+        try:
+            from scraper.service import serve
+        except ImportError as e:
+            parser.error(f"--serve needs the service dependencies ({e})")
+        asyncio.run(serve(args.host, args.port, args.socket, args.workers, args.browsers, args.drain_timeout))
+        return
+    if not args.url:
+        parser.error("url is required unless --serve is given")
+
+    from scraper.core import Scraper
+
+    scraper = Scraper(args.url)
+
     try:
-        asyncio.run(scraper.run())
+        if args.crawl:
+            asyncio.run(scraper.crawl(args.max_pages))
+        else:
+            asyncio.run(scraper.run())
     except Exception as e:
         print(f"Error: {str(e)}")
-        sys.exit(1)
+        if not args.drain_retries:
+            sys.exit(1)
+
+    if args.drain_retries:
+        asyncio.run(scraper.drain_retries(args.workers))
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,26 @@
 """Scraper package."""
 
-from .core import Scraper
-from .extractor import Extractor
+import importlib
+
+# Resolved on first access so that importing the package (or a light
+# submodule such as scraper.frontier) does not pull in Playwright, bs4 and
+# httpx up front.
+_LAZY = {
+    "Scraper": ".core",
+    "Extractor": ".extractor",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,408 @@
+# scraper/archive.py
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from time import time
+from typing import Any, Dict, Iterator, List
+from urllib.parse import urlparse
+
+from scraper.extractor import Extractor
+from scraper.selector_manager import get_valid_auction_selectors
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available; zstd is faster and smaller when installed
+    zstandard = None
+
+KIND_HTML = 'html'
+KIND_SCREENSHOT = 'screenshot'
+
+# Content-defined chunking: cut after a '>' whose tag hash hits the mask,
+# so an edit only changes the chunks around it (average ~8 KB for markup)
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+BOUNDARY_MASK = 0x7F
+_TAG_END = re.compile(rb'(?<=>)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    chunks TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS blob_chunks (
+    blob TEXT NOT NULL,
+    chunk TEXT NOT NULL,
+    PRIMARY KEY (blob, chunk)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blob_chunks_chunk ON blob_chunks (chunk);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_lookup ON snapshots (url, kind, created_at);
+CREATE INDEX IF NOT EXISTS snapshots_created_at ON snapshots (created_at);
+CREATE INDEX IF NOT EXISTS snapshots_blob ON snapshots (blob);
+"""
+
+
+@dataclass
+class Snapshot:
+    id: int
+    url: str
+    kind: str
+    blob: str
+    size: int
+    created_at: float
+
+
+def split_chunks(data: bytes) -> List[bytes]:
+    """
+    Split markup into content-defined chunks.
+
+    Args:
+        data: Raw bytes; anything without tag boundaries ends up in
+            ``MAX_CHUNK``-sized pieces
+
+    Returns:
+        Chunks whose concatenation is ``data``
+    """
+    chunks, current, size = [], [], 0
+    for piece in _TAG_END.split(data):
+        while len(piece) > MAX_CHUNK:
+            if current:
+                chunks.append(b''.join(current))
+                current, size = [], 0
+            chunks.append(piece[:MAX_CHUNK])
+            piece = piece[MAX_CHUNK:]
+        current.append(piece)
+        size += len(piece)
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(piece) & BOUNDARY_MASK == 0):
+            chunks.append(b''.join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(b''.join(current))
+    return [c for c in chunks if c]
+
+
+def _compress(data: bytes, kind: str) -> tuple:
+    if kind == KIND_SCREENSHOT:
+        return 'raw', data  # PNG/JPEG are already compressed
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=3).compress(data)
+    return 'zlib', zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'raw':
+        return data
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Archive chunk is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+
+# One archive (and SQLite connection) per domain, shared by every scraper in the process
+_archives: Dict[str, "Archive"] = {}
+
+
+class Archive:
+    """
+    Per-domain, content-addressed archive of rendered HTML and screenshots.
+
+    Snapshots are stored in ``memory/<domain>/archive.db``. HTML is split
+    into content-defined chunks keyed by SHA-256, so repeated and
+    near-identical snapshots of a page only store the chunks that changed.
+    Retention (age, snapshots per URL, total size) is applied on write.
+    """
+
+    def __init__(self, domain, max_age_days=None, max_per_url=None, max_mb=None):
+        self.domain = (urlparse(domain).netloc or domain).replace("www.", "")
+        self.dir = os.path.join("memory", self.domain)
+        os.makedirs(self.dir, exist_ok=True)
+        self.max_age_days = max_age_days
+        self.max_per_url = max_per_url
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.db = sqlite3.connect(os.path.join(self.dir, "archive.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        # Shared by the whole process and written from worker threads
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, domain, config: Dict[str, Any]) -> "Archive":
+        """Return the process-wide archive for a domain, with the site config's ``archive`` limits."""
+        settings = config.get("archive") or {}
+        archive = _archives.get(domain)
+        if archive is None:
+            archive = _archives[domain] = cls(domain)
+        archive.max_age_days = settings.get("max_age_days")
+        archive.max_per_url = settings.get("max_per_url")
+        archive.max_bytes = settings["max_mb"] * 1024 * 1024 if settings.get("max_mb") else None
+        return archive
+
+    def _store_blob(self, data: bytes, kind: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if self.db.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+            return digest
+
+        pieces = [data] if kind == KIND_SCREENSHOT else split_chunks(data)
+        hashes = []
+        for piece in pieces:
+            chunk_hash = hashlib.sha256(piece).hexdigest()
+            hashes.append(chunk_hash)
+            if not self.db.execute("SELECT 1 FROM chunks WHERE hash = ?", (chunk_hash,)).fetchone():
+                codec, packed = _compress(piece, kind)
+                self.db.execute(
+                    "INSERT INTO chunks (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                    (chunk_hash, codec, len(packed), packed)
+                )
+        self.db.execute(
+            "INSERT INTO blobs (hash, size, chunks) VALUES (?, ?, ?)", (digest, len(data), json.dumps(hashes))
+        )
+        self.db.executemany(
+            "INSERT OR IGNORE INTO blob_chunks (blob, chunk) VALUES (?, ?)", [(digest, h) for h in hashes]
+        )
+        return digest
+
+    def put(self, url: str, kind: str, data: bytes, created_at: float | None = None) -> int:
+        """
+        Archive one snapshot.
+
+        Args:
+            url: Page URL the snapshot was taken from
+            kind: ``html`` or ``screenshot``
+            data: Snapshot bytes
+            created_at: Timestamp, defaults to now
+
+        Returns:
+            Snapshot id
+        """
+        with self._lock:
+            with self.db:
+                digest = self._store_blob(data, kind)
+                cursor = self.db.execute(
+                    "INSERT INTO snapshots (url, kind, blob, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, kind, digest, len(data), created_at or time())
+                )
+            self.apply_retention(url)
+        return cursor.lastrowid
+
+    def save_html(self, url: str, html: str) -> int:
+        return self.put(url, KIND_HTML, html.encode("utf-8"))
+
+    def save_screenshot(self, url: str, image: bytes) -> int:
+        return self.put(url, KIND_SCREENSHOT, image)
+
+    def read(self, snapshot: Snapshot | int) -> bytes:
+        """Return the bytes of a snapshot."""
+        if isinstance(snapshot, int):
+            snapshot_id, snapshot = snapshot, self.get(snapshot)
+            if snapshot is None:
+                raise KeyError(snapshot_id)
+        stored = {}
+        with self._lock:
+            row = self.db.execute("SELECT chunks FROM blobs WHERE hash = ?", (snapshot.blob,)).fetchone()
+            hashes = json.loads(row[0])
+            unique = list(dict.fromkeys(hashes))
+            # Stay under SQLite's bound-variable limit on very large documents
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                for h, codec, data in self.db.execute(
+                    f"SELECT hash, codec, data FROM chunks WHERE hash IN ({', '.join('?' * len(batch))})", batch
+                ):
+                    stored[h] = (codec, data)
+        return b''.join(_decompress(*stored[h]) for h in hashes)
+
+    def read_html(self, snapshot: Snapshot | int) -> str:
+        return self.read(snapshot).decode("utf-8")
+
+    def get(self, snapshot_id: int) -> Snapshot | None:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT id, url, kind, blob, size, created_at FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+        return Snapshot(*row) if row else None
+
+    def find(self, url: str | None = None, kind: str | None = KIND_HTML, since: float | None = None,
+             until: float | None = None, limit: int | None = None) -> List[Snapshot]:
+        """
+        Look up snapshots, newest first.
+
+        Args:
+            url: Exact page URL, or None for every URL
+            kind: ``html``, ``screenshot`` or None for both
+            since: Only snapshots taken at or after this timestamp
+            until: Only snapshots taken at or before this timestamp
+            limit: Maximum number of snapshots
+
+        Returns:
+            Matching snapshots
+        """
+        clauses, params = [], []
+        for column, op, value in (("url", "=", url), ("kind", "=", kind),
+                                  ("created_at", ">=", since), ("created_at", "<=", until)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT id, url, kind, blob, size, created_at FROM snapshots"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [Snapshot(*row) for row in self.db.execute(sql, params)]
+
+    def latest(self, url: str, kind: str = KIND_HTML, at: float | None = None) -> Snapshot | None:
+        """Most recent snapshot of a URL taken at or before ``at``."""
+        found = self.find(url, kind, until=at, limit=1)
+        return found[0] if found else None
+
+    def iter_snapshots(self, kind: str | None = KIND_HTML) -> Iterator[Snapshot]:
+        """Every snapshot, oldest first."""
+        sql = "SELECT id, url, kind, blob, size, created_at FROM snapshots"
+        params = ()
+        if kind:
+            sql += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            rows = self.db.execute(sql + " ORDER BY created_at, id", params).fetchall()
+        for row in rows:
+            yield Snapshot(*row)
+
+    def apply_retention(self, url: str | None = None) -> int:
+        """Drop snapshots outside the retention limits and unreferenced data; return how many were dropped."""
+        dropped = 0
+        with self._lock, self.db:
+            if self.max_age_days is not None:
+                cutoff = time() - self.max_age_days * 86400
+                dropped += self.db.execute("DELETE FROM snapshots WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_per_url:
+                sql, params = "SELECT DISTINCT url, kind FROM snapshots", ()
+                if url:
+                    sql, params = sql + " WHERE url = ?", (url,)
+                for u, k in self.db.execute(sql, params).fetchall():
+                    dropped += self.db.execute(
+                        "DELETE FROM snapshots WHERE url = ? AND kind = ? AND id NOT IN ("
+                        "SELECT id FROM snapshots WHERE url = ? AND kind = ? "
+                        "ORDER BY created_at DESC, id DESC LIMIT ?)",
+                        (u, k, u, k, self.max_per_url)
+                    ).rowcount
+            if self.max_bytes:
+                dropped += self._trim_to_size()
+            if dropped:
+                self._collect_garbage()
+        return dropped
+
+    def _trim_to_size(self) -> int:
+        # Sum once, then subtract what each deletion frees
+        total = self.stored_bytes()
+        dropped = 0
+        while total > self.max_bytes:
+            oldest = self.db.execute(
+                "SELECT id, blob FROM snapshots ORDER BY created_at, id LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                break
+            for snapshot_id, blob in oldest:
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+                total -= self._drop_blob(blob)
+                dropped += 1
+        return dropped
+
+    def _drop_blob(self, blob: str) -> int:
+        """Delete a blob no snapshot uses any more, with its unshared chunks; return the bytes freed."""
+        if self.db.execute("SELECT 1 FROM snapshots WHERE blob = ? LIMIT 1", (blob,)).fetchone():
+            return 0
+        unshared = (
+            "FROM chunks WHERE hash IN (SELECT chunk FROM blob_chunks WHERE blob = ?) AND NOT EXISTS ("
+            "SELECT 1 FROM blob_chunks AS other WHERE other.chunk = chunks.hash AND other.blob != ?)"
+        )
+        freed = self.db.execute(f"SELECT COALESCE(SUM(size), 0) {unshared}", (blob, blob)).fetchone()[0]
+        self.db.execute(f"DELETE {unshared}", (blob, blob))
+        self.db.execute("DELETE FROM blob_chunks WHERE blob = ?", (blob,))
+        self.db.execute("DELETE FROM blobs WHERE hash = ?", (blob,))
+        return freed
+
+    def _collect_garbage(self):
+        orphans = [r[0] for r in self.db.execute(
+            "SELECT hash FROM blobs WHERE NOT EXISTS (SELECT 1 FROM snapshots WHERE snapshots.blob = blobs.hash)"
+        )]
+        if not orphans:
+            return
+        self.db.executemany("DELETE FROM blob_chunks WHERE blob = ?", [(h,) for h in orphans])
+        self.db.executemany("DELETE FROM blobs WHERE hash = ?", [(h,) for h in orphans])
+        self.db.execute(
+            "DELETE FROM chunks WHERE NOT EXISTS (SELECT 1 FROM blob_chunks WHERE blob_chunks.chunk = chunks.hash)"
+        )
+
+    def stored_bytes(self) -> int:
+        with self._lock:
+            return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM chunks").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshots, logical = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM snapshots"
+            ).fetchone()
+            stored = self.stored_bytes()
+        return {
+            "snapshots": snapshots,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "ratio": round(logical / stored, 2) if stored else None,
+            "codec": "zstd" if zstandard is not None else "zlib"
+        }
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+async def replay(archive: Archive, snapshot: Snapshot | int, custom_selectors: Dict[str, Any] | None = None,
+                 use_structured_data: bool = True) -> Dict[str, Any]:
+    """
+    Run the extractor over an archived HTML snapshot without touching the network.
+
+    Args:
+        archive: Archive holding the snapshot
+        snapshot: Snapshot or snapshot id
+        custom_selectors: Site custom_selectors, as in the site config
+        use_structured_data: Prefer JSON-LD/microdata lots, as in a live scrape
+
+    Returns:
+        Extracted data in the same layout as ``Extractor.extract``
+    """
+    if isinstance(snapshot, int):
+        snapshot = archive.get(snapshot)
+    html = archive.read_html(snapshot)
+    custom = (custom_selectors or {}).get("auction_items")
+    selectors = get_valid_auction_selectors(html, custom)
+    extractor = Extractor(html, snapshot.url, {"auction_items": selectors}, use_structured_data=use_structured_data)
+    return await extractor.extract()
@@ -0,0 +1,308 @@
+# scraper/asset_cache.py
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, asdict, fields, replace
+from email.utils import parsedate_to_datetime
+from time import time
+from typing import Any, Dict
+
+# Browser resource types served from the cache
+STATIC_RESOURCE_TYPES = {'script', 'stylesheet', 'font'}
+
+# Hop-by-hop and encoding headers that no longer describe the stored body, and
+# cookies, which must never be replayed into other browser contexts
+_DROP_HEADERS = {
+    'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'set-cookie'
+}
+
+# Without max-age/Expires, assume fresh for 10% of the time since Last-Modified (RFC 9111 4.2.2)
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_AGE = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_last_access ON assets (last_access);
+"""
+
+
+@dataclass
+class AssetCacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_saved: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def snapshot(self) -> "AssetCacheStats":
+        return replace(self)
+
+    def since(self, start: "AssetCacheStats") -> "AssetCacheStats":
+        """Counts accumulated after ``start`` was taken."""
+        return AssetCacheStats(**{f.name: getattr(self, f.name) - getattr(start, f.name) for f in fields(self)})
+
+
+def _cache_control(headers: Dict[str, str]) -> Dict[str, str | None]:
+    directives = {}
+    for part in headers.get('cache-control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], now: float | None = None) -> float | None:
+    """
+    Work out how long a response may be served without revalidation.
+
+    Args:
+        headers: Response headers with lower-case names
+        now: Current time, for tests and batch use
+
+    Returns:
+        Lifetime in seconds, 0 when it must be revalidated before each use,
+        or None when the response must not be stored at all (including
+        responses that set cookies)
+    """
+    now = time() if now is None else now
+    directives = _cache_control(headers)
+    if 'no-store' in directives or 'private' in directives or 'set-cookie' in headers:
+        return None
+    vary = {v.strip().lower() for v in headers.get('vary', '').split(',') if v.strip()}
+    if vary - {'accept-encoding', 'origin'}:
+        return None
+    if 'no-cache' in directives:
+        return 0
+
+    for name in ('s-maxage', 'max-age'):
+        value = directives.get(name)
+        if value and re.fullmatch(r'\d+', value):
+            return max(int(value) - int(headers.get('age', '0') or 0), 0)
+
+    expires = _http_date(headers.get('expires'))
+    if expires is not None:
+        date = _http_date(headers.get('date')) or now
+        return max(expires - date, 0)
+
+    last_modified = _http_date(headers.get('last-modified'))
+    if last_modified is not None:
+        return min(max(now - last_modified, 0) * HEURISTIC_FRACTION, HEURISTIC_MAX_AGE)
+
+    # Nothing to go on; keep it only if it can be revalidated cheaply
+    return 0 if 'etag' in headers else None
+
+
+# One cache (and SQLite connection) per directory, shared by every scraper in the process
+_caches: Dict[str, "AssetCache"] = {}
+
+
+class AssetCache:
+    """
+    Shared on-disk cache for static browser assets (scripts, stylesheets, fonts).
+
+    Bodies are stored as files keyed by a hash of the URL and indexed in
+    SQLite with their headers and expiry. Fresh entries are served without
+    touching the network, stale ones are revalidated with ETag /
+    Last-Modified, and the least recently used entries are evicted once
+    the cache grows past ``max_bytes``. Disk and index work runs in worker
+    threads so route handlers never block the event loop.
+    """
+
+    def __init__(self, directory: str = os.path.join('memory', '_assets'), max_bytes: int = 512 * 1024 * 1024):
+        self.dir = directory
+        self.max_bytes = max_bytes
+        self.stats = AssetCacheStats()
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.dir, 'index.db'), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        # One connection serves every worker thread; keep transactions apart
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AssetCache | None":
+        """Return the process-wide cache for a site config's ``asset_cache`` block, or None if disabled."""
+        settings = config.get('asset_cache') or {}
+        if not settings.get('enabled', True):
+            return None
+        directory = settings.get('dir', os.path.join('memory', '_assets'))
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = cls(directory, int(settings.get('max_mb', 512)) * 1024 * 1024)
+        return cache
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], key)
+
+    def get(self, url: str) -> Dict[str, Any] | None:
+        """Return the cached entry for a URL (fresh or stale), or None."""
+        key = self._key(url)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT status, headers, size, expires_at FROM assets WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                body = f.read()
+        except OSError:
+            self._delete(key)
+            return None
+        status, headers, size, expires_at = row
+        return {
+            'status': status,
+            'headers': json.loads(headers),
+            'body': body,
+            'size': size,
+            'fresh': expires_at > time()
+        }
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        """Store a response if its headers allow it; return True if it was stored."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        lifetime = freshness_lifetime(headers)
+        if status != 200 or lifetime is None:
+            return False
+
+        key = self._key(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        now = time()
+        stored = {k: v for k, v in headers.items() if k not in _DROP_HEADERS}
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO assets (key, url, status, headers, size, stored_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(stored), len(body), now, now + lifetime, now)
+            )
+            self.db.commit()
+            self.stats.stored += 1
+            self._evict()
+        return True
+
+    def refresh(self, url: str, headers: Dict[str, str]):
+        """Extend a stale entry after a 304 Not Modified."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        lifetime = freshness_lifetime(headers) or 0
+        now = time()
+        with self._lock:
+            self.db.execute(
+                "UPDATE assets SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + lifetime, now, self._key(url))
+            )
+            self.db.commit()
+
+    def touch(self, url: str):
+        with self._lock:
+            self.db.execute("UPDATE assets SET last_access = ? WHERE key = ?", (time(), self._key(url)))
+            self.db.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM assets").fetchone()[0]
+
+    def _delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+        with self._lock:
+            self.db.execute("DELETE FROM assets WHERE key = ?", (key,))
+            self.db.commit()
+
+    def _evict(self):
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._lock:
+            rows = self.db.execute("SELECT key, size FROM assets ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if excess <= 0:
+                break
+            self._delete(key)
+            excess -= size
+            self.stats.evicted += 1
+        self.logger.debug(f"Asset cache evicted down to {self.size()} bytes ({self.stats.evicted} evictions so far)")
+
+    async def handle(self, route) -> None:
+        """
+        Serve a Playwright route from the cache, fetching and storing on a miss.
+
+        Args:
+            route: Playwright route for a GET of a static resource
+        """
+        url = route.request.url
+        cached = await asyncio.to_thread(self.get, url)
+        if cached and cached['fresh']:
+            await asyncio.to_thread(self.touch, url)
+            self.stats.hits += 1
+            self.stats.bytes_saved += cached['size']
+            await route.fulfill(status=cached['status'], headers=cached['headers'], body=cached['body'])
+            return
+
+        headers = dict(route.request.headers)
+        if cached:
+            if 'etag' in cached['headers']:
+                headers['if-none-match'] = cached['headers']['etag']
+            if 'last-modified' in cached['headers']:
+                headers['if-modified-since'] = cached['headers']['last-modified']
+
+        response = await route.fetch(headers=headers)
+        if cached and response.status == 304:
+            await asyncio.to_thread(self.refresh, url, {**cached['headers'], **response.headers})
+            self.stats.revalidated += 1
+            self.stats.bytes_saved += cached['size']
+            await route.fulfill(status=cached['status'], headers=cached['headers'], body=cached['body'])
+            return
+
+        body = await response.body()
+        self.stats.misses += 1
+        await asyncio.to_thread(self.put, url, response.status, response.headers, body)
+        await route.fulfill(
+            status=response.status,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            body=body
+        )
+
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -0,0 +1,97 @@
+# scraper/browser_pool.py
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+
+def load_playwright():
+    """
+    Import Playwright on first browser use.
+
+    It is the slowest import in the package and HTTP-tier scrapes never
+    need it, so nothing imports it at module level.
+
+    Returns:
+        ``playwright.async_api.async_playwright``
+    """
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError as e:
+        raise RuntimeError(
+            "Browser rendering needs Playwright: pip install playwright && playwright install chromium"
+        ) from e
+    return async_playwright
+
+
+class BrowserPool:
+    """
+    Keep one Chromium process warm and hand out isolated browser contexts.
+
+    Each job gets a fresh context (its own cookies and storage), so jobs
+    never see each other's sessions, but none of them pays for starting
+    Playwright or launching the browser. At most ``max_contexts`` contexts
+    are open at once; the browser is relaunched if it crashes.
+    """
+
+    def __init__(self, max_contexts: int = 4, launch_options: Dict[str, Any] | None = None):
+        self.max_contexts = max_contexts
+        self.launch_options = launch_options or {}
+        self.launches = 0
+        self.contexts_opened = 0
+        self.active = 0
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        await self._ensure_browser()
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await load_playwright()().start()
+            if self._browser is not None:
+                self.logger.warning("Browser disconnected; relaunching")
+            self._browser = await self._playwright.chromium.launch(**self.launch_options)
+            self.launches += 1
+            return self._browser
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """Open a browser context on the warm browser; it is closed on exit."""
+        async with self._slots:
+            browser = await self._ensure_browser()
+            context = await browser.new_context(**options)
+            self.contexts_opened += 1
+            self.active += 1
+            try:
+                yield context
+            finally:
+                self.active -= 1
+                try:
+                    await context.close()
+                except Exception:
+                    pass  # browser already gone; the next context relaunches it
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": bool(self._browser and self._browser.is_connected()),
+            "max_contexts": self.max_contexts,
+            "active_contexts": self.active,
+            "contexts_opened": self.contexts_opened,
+            "launches": self.launches
+        }
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
@@ -1,9 +1,13 @@
 # scraper/config_manager.py
 
 import os
+import copy
 import yaml
 from urllib.parse import urlparse
 
+# domain -> (mtime, parsed config) for get_cached_config
+_config_cache = {}
+
 def get_config_for_domain(url):
     """Get configuration for a specific domain."""
     domain = urlparse(url).netloc
@@ -32,8 +36,8 @@ def get_config_for_domain(url):
             },
             "api_endpoints": [],
             "timeouts": {
-                "page_load": 30,
-                "dynamic_wait": 5
+                "page_load": 30000,
+                "dynamic_wait": 5000
             },
             "retry_attempts": 3,
             "scroll": True,
@@ -46,3 +50,55 @@ def get_config_for_domain(url):
             yaml.dump(default_config, f)
         
         return default_config
+
+
+def get_cached_config(url):
+    """Get a domain's configuration, re-reading the YAML only when the file changes.
+
+    Long-running processes use this instead of parsing the site config for
+    every job; callers get their own copy and may modify it.
+    """
+    domain = urlparse(url).netloc
+    config_path = f"config/sites/{domain}.yaml"
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    cached = _config_cache.get(domain)
+    if cached is None or mtime is None or cached[0] != mtime:
+        config = get_config_for_domain(url)
+        cached = _config_cache[domain] = (os.stat(config_path).st_mtime_ns, config)
+    return copy.deepcopy(cached[1])
+
+
+def update_domain_config(url, key, value):
+    """Persist a learned top-level value into the domain's site config.
+
+    Only the block for ``key`` is rewritten; the rest of the hand-written
+    YAML (including comments) is left untouched.
+    """
+    domain = urlparse(url).netloc
+    config_path = f"config/sites/{domain}.yaml"
+    if not os.path.exists(config_path):
+        get_config_for_domain(url)
+
+    with open(config_path, 'r') as f:
+        lines = f.read().splitlines()
+
+    kept = []
+    in_block = False
+    for line in lines:
+        if line.startswith(f"{key}:"):
+            in_block = True
+            continue
+        if in_block and (not line.strip() or line[0] in (' ', '\t', '-')):
+            continue
+        in_block = False
+        kept.append(line)
+
+    while kept and not kept[-1].strip():
+        kept.pop()
+    block = yaml.dump({key: value}, default_flow_style=False, sort_keys=True)
+    with open(config_path, 'w') as f:
+        f.write("\n".join(kept) + "\n\n" + block)
@@ -5,75 +5,237 @@ from scraper.selector_logger import update_successful_selectors
 from scraper.config_sync import sync_config_to_db
 from scraper.heuristics_logger import log_heuristics
 from scraper.extractor import Extractor
+from scraper.dom_extractor import extract_in_page
+from scraper.fetcher import TieredFetcher, FetchError
+from scraper.retry import RetryPolicy, classify_error, SELECTOR_MISS
+from scraper.session_store import SessionStore, AUTH_FAILURE_STATUSES, is_auth_redirect
 from scraper.selector_manager import get_valid_auction_selectors
+from scraper.schema_adapters import adapt_auction_items
+from scraper.pagination import plan_pages
+from scraper.rate_limit import get_rate_limiter
+from scraper.details import DetailEnricher
+from scraper.frontier import Frontier, canonicalize_url
+from scraper.asset_cache import AssetCache, STATIC_RESOURCE_TYPES
+from scraper.archive import Archive
+from scraper.browser_pool import load_playwright
 from utils.memory import MemoryBank
 from utils.logger import Logger
+from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from time import time
-from playwright.async_api import async_playwright
 import os
 from datetime import datetime
 import json
 import asyncio
+import hashlib
+from contextlib import asynccontextmanager
 
 class Scraper:
-    def __init__(self, url, memory: MemoryBank | None = None, logger: Logger | None = None):
-        self.url = url if url.startswith(('http://', 'https://')) else f'https://{url}'
+    def __init__(self, url, memory: MemoryBank | None = None, logger: Logger | None = None,
+                 config=None, browser_pool=None):
+        url = url if url.startswith(('http://', 'https://')) else f'https://{url}'
+        self.url = canonicalize_url(url)
         self.domain = urlparse(self.url).netloc
         self.config_path = f"config/sites/{self.domain}.yaml"
-        self.config = get_config_for_domain(self.url)
+        self.config = config if config is not None else get_config_for_domain(self.url)
+        self.browser_pool = browser_pool
+        self.on_page = None
+        self.ignore_params = (self.config.get("frontier") or {}).get("ignore_params", [])
+        self.url = self.canonicalize(self.url)
 
-        self.memory = memory or MemoryBank(self.domain)
+        retention = self.config.get("memory") or {}
+        self.memory = memory or MemoryBank(
+            self.domain,
+            max_pages=retention.get("max_pages", 10000),
+            max_failures=retention.get("max_failures", 5000),
+            max_age_days=retention.get("max_age_days"),
+            mmap_size=retention.get("mmap_size", 0)
+        )
         self.logger = logger or Logger(self.domain)
 
         self.enable_dynamic = self.config.get("enable_dynamic", True)
         self.enable_navigation = self.config.get("enable_navigation", True)
         self.enable_auction = self.config.get("enable_auction", True)
         self.custom_selectors = self.config.get("custom_selectors", {})
+        self.extraction_mode = self.config.get("extraction_mode", "html")
+        self.session = SessionStore(self.domain, ttl=(self.config.get("session") or {}).get("ttl", 86400))
+        self.fetcher = TieredFetcher(self.url, self.config, render=self._render_html, session=self.session)
+        self.retry_policy = RetryPolicy.from_config(self.config)
+        self.detail_enabled = (self.config.get("detail") or {}).get("enabled", False)
+        self.details = None
+        self.assets = AssetCache.from_config(self.config)
+        log_settings = self.config.get("logging") or {}
+        self.archive_html = log_settings.get("save_html", False)
+        self.archive_screenshots = log_settings.get("save_screenshots", False)
+        if self.archive_html and self.extraction_mode == "dom":
+            # Serializing the page would undo what DOM mode saves
+            self.logger.warning("logging.save_html is ignored with extraction_mode: dom")
+            self.archive_html = False
+        self.archive = Archive.from_config(self.domain, self.config) \
+            if self.archive_html or self.archive_screenshots else None
 
+    def canonicalize(self, url):
+        """Canonical form of a URL under this site's ignore rules."""
+        return canonicalize_url(url, self.ignore_params)
 
-    async def load_html(self):
-        """Load HTML content using Playwright."""
-        async with async_playwright() as p:
+    @asynccontextmanager
+    async def _open_page(self):
+        """Open a page in a fresh context, on the warm browser pool when one is attached."""
+        if self.browser_pool:
+            async with self.browser_pool.context(storage_state=self.session.load()) as context:
+                yield context, await context.new_page()
+            return
+
+        async with load_playwright()() as p:
             browser = await p.chromium.launch()
-            page = await browser.new_page()
-            
             try:
-                self.logger.info("Loading page...")
-                await page.goto(self.url, wait_until='networkidle')
-                
-                self.logger.info("Waiting for initial content...")
-                await page.wait_for_load_state('domcontentloaded')
-                
-                if self.enable_dynamic:
-                    self.logger.info("Scrolling to load more content...")
-                    await page.evaluate("""
-                        window.scrollTo(0, document.body.scrollHeight);
-                        setTimeout(() => { window.scrollTo(0, 0); }, 2000);
-                    """)
-                    
-                    self.logger.info("Waiting for dynamic content...")
-                    try:
-                        await page.wait_for_selector("div[class*='lot'], .auction-item, [data-lot-id]", timeout=30000)
-                        self.logger.info("Found content with selector: div[class*='lot']")
-                    except Exception as e:
-                        self.logger.warning(f"Timeout waiting for auction items: {str(e)}")
-                
-                return await page.content(), page
+                context = await browser.new_context(storage_state=self.session.load())
+                yield context, await context.new_page()
             finally:
                 await browser.close()
 
+    async def load_html(self, url=None):
+        """Load HTML content using Playwright."""
+        async with self._open_page() as (context, page):
+            await self._prepare_page(page, url)
+            await self._save_session(context, page)
+            await self._archive_screenshot(page, url)
+            return await page.content(), page
+
+    async def _render_html(self, url, wait_for=None):
+        """Render callback for the tiered fetcher: the page's HTML and HTTP status."""
+        async with self._open_page() as (context, page):
+            status = await self._prepare_page(page, url, wait_for)
+            await self._save_session(context, page)
+            await self._archive_screenshot(page, url)
+            return await page.content(), status
+
+    async def load_records(self, url=None):
+        """Load the page and extract lot records inside the browser."""
+        async with self._open_page() as (context, page):
+            await self._prepare_page(page, url)
+            await self._save_session(context, page)
+            await self._archive_screenshot(page, url)
+            self.logger.info("Extracting records in page...")
+            return await extract_in_page(page, url or self.url, {
+                "auction_items": self.custom_selectors.get("auction_items")
+            })
+
+    async def _save_session(self, context, page):
+        """Persist cookies/localStorage unless the page landed on a login or consent wall."""
+        if is_auth_redirect(page.url):
+            self.session.invalidate(f"redirected to {page.url}")
+        else:
+            self.session.save(await context.storage_state())
+
+    async def _archive_screenshot(self, page, url=None):
+        if not self.archive_screenshots:
+            return
+        try:
+            image = await page.screenshot(full_page=True)
+            # Hashing, the index write and retention would block every other page
+            await asyncio.to_thread(self.archive.save_screenshot, url or self.url, image)
+        except Exception as e:
+            self.logger.warning(f"Screenshot failed: {str(e)}")
+
+    async def _prepare_page(self, page, url=None, wait_for=None):
+        """
+        Navigate to the target URL and wait for dynamic content; return the HTTP status.
+
+        ``wait_for`` lists the selectors that mean the content is there (a
+        detail page's field selectors, say); listing selectors by default.
+        """
+        if self.assets:
+            await page.route("**/*", self._route_assets)
+
+        self.logger.info("Loading page...")
+        response = await page.goto(url or self.url, wait_until='networkidle')
+        status = response.status if response is not None else 200
+        if status in AUTH_FAILURE_STATUSES:
+            # Raise before _save_session can store the rejected state again
+            self.session.invalidate(f"HTTP {status} for {page.url}")
+        if status >= 400:
+            raise FetchError(url or self.url, status)
+        
+        self.logger.info("Waiting for initial content...")
+        await page.wait_for_load_state('domcontentloaded')
+        
+        if self.enable_dynamic:
+            self.logger.info("Scrolling to load more content...")
+            await page.evaluate("""
+                window.scrollTo(0, document.body.scrollHeight);
+                setTimeout(() => { window.scrollTo(0, 0); }, 2000);
+            """)
+            
+            self.logger.info("Waiting for dynamic content...")
+            selector = ", ".join(wait_for) if wait_for else "div[class*='lot'], .auction-item, [data-lot-id]"
+            try:
+                await page.wait_for_selector(selector, timeout=30000)
+                self.logger.info(f"Found content with selector: {selector}")
+            except Exception as e:
+                self.logger.warning(f"Timeout waiting for auction items: {str(e)}")
+        return status
+
+    async def _route_assets(self, route):
+        """Serve scripts, stylesheets and fonts from the shared asset cache."""
+        request = route.request
+        try:
+            if request.method == "GET" and request.resource_type in STATIC_RESOURCE_TYPES:
+                await self.assets.handle(route)
+            else:
+                await route.continue_()
+        except Exception as e:
+            self.logger.warning(f"Asset cache error for {request.url}: {str(e)}")
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    async def extract_page(self, url=None, limiter=None):
+        """Fetch a single page and extract its data."""
+        url = url or self.url
+        limiter = limiter or get_rate_limiter(self.domain, self.config)
+        if self.extraction_mode == "dom":
+            async with limiter:
+                extracted_data = await self.load_records(url)
+        else:
+            async with limiter:
+                result = await self.fetcher.fetch(url, self.custom_selectors.get("auction_items"))
+            self.logger.info(f"Fetched {url} via {result.tier}")
+            if self.archive_html:
+                await asyncio.to_thread(self.archive.save_html, url, result.html)
+            # Parsing and extraction are CPU-bound; keep them off the event loop
+            extracted_data = await asyncio.to_thread(self._extract_html, result, url)
+
+        items = extracted_data.get("auction_data") or []
+        extracted_data["lots"] = [
+            lot._asdict() for lot in adapt_auction_items(items, self.domain, self.config.get("timezone"))
+        ] if items else []
+
+        if self.detail_enabled and extracted_data.get("auction_data"):
+            if self.details is None:
+                self.details = DetailEnricher(self.fetcher, self.memory, self.config, limiter)
+            await self.details.enrich(extracted_data["auction_data"])
+        return extracted_data
+
+    def _extract_html(self, result, url):
+        """Extract a fetched page; blocking, run in a worker thread."""
+        # Reuse the HTTP tier's parse; browser-rendered pages are parsed once here
+        soup = result.soup or BeautifulSoup(result.html, "html.parser")
+        selectors = get_valid_auction_selectors(result.html, self.custom_selectors.get("auction_items"), soup)
+        extractor = Extractor(result.html, url, {"auction_items": selectors},
+                              use_structured_data=self.config.get("structured_data", True), soup=soup)
+        return extractor.extract_sync()
+
     async def run(self):
         """Main scraping method."""
         try:
             t1 = time()
+            # The asset cache is shared by the process; report only this run's share
+            assets_start = self.assets.stats.snapshot() if self.assets else None
             self.logger.info(f"Starting scrape of {self.url}")
             
-            html, page = await self.load_html()
-
-            selectors = get_valid_auction_selectors(html, self.custom_selectors.get("auction_items"))
-            extractor = Extractor(html, self.url, {"auction_items": selectors})
-            extracted_data = await extractor.extract()
+            extracted_data = await self.extract_page()
 
             t2 = time()
 
@@ -84,6 +246,10 @@ class Scraper:
 
             log_heuristics(self.url, {
                 "dynamic_enabled": self.enable_dynamic,
+                "extraction_mode": self.extraction_mode,
+                "fetch_tiers": self.fetcher.tiers,
+                "details": self.details.progress.as_dict() if self.details else None,
+                "asset_cache": self.assets.stats.since(assets_start).as_dict() if self.assets else None,
                 "selector_types": list(self.custom_selectors.keys()),
                 "timing": {
                     "start": t1,
@@ -93,13 +259,178 @@ class Scraper:
             })
 
             self.save_data(extracted_data)
+            if self.on_page:
+                self.on_page(self.url, extracted_data)
+            if self.enable_auction and not extracted_data.get("auction_data"):
+                self.logger.warning("No auction items matched")
+                await asyncio.to_thread(self.schedule_retry, SELECTOR_MISS, "No auction items matched")
+            else:
+                await asyncio.to_thread(self.memory.dequeue_retry, self.url)
             self.logger.info("Scrape completed successfully")
             
             return extracted_data
         except Exception as e:
             self.logger.error(f"Error during scraping: {str(e)}")
             self.record_error(str(e))
+            if getattr(e, "status", None) in AUTH_FAILURE_STATUSES:
+                self.session.invalidate(str(e))
+            await asyncio.to_thread(self.schedule_retry, classify_error(e), str(e))
             raise
+        finally:
+            await self.fetcher.aclose()
+
+    async def crawl(self, max_pages=None):
+        """
+        Scrape the start URL and the listing pages that follow it.
+
+        When total_pages is known and the page URL template can be inferred,
+        the remaining pages are fetched concurrently within the domain's
+        rate limit; otherwise next_page links are followed one by one.
+        Pending pages are kept in a persistent Frontier, so a crawl that is
+        interrupted picks up the pages it had not finished on the next run.
+
+        Raises:
+            FrontierBusy: Another crawl of the same start URL is running
+        """
+        # Take the frontier before fetching anything, so a second crawl of
+        # this URL is refused instead of working through the first one's leases
+        frontier = await asyncio.to_thread(self._open_frontier) if self.enable_navigation else None
+        try:
+            first = await self.run()
+            await asyncio.to_thread(self.memory.save_data, first)
+            pages = [first]
+            if frontier is None:
+                return pages
+
+            limiter = get_rate_limiter(self.domain, self.config)
+            navigation = first.get("navigation") or {}
+            planned = plan_pages(self.url, navigation, max_pages)
+            if planned:
+                self.logger.info(f"Fetching {len(planned)} listing pages concurrently")
+            entries = [(url, 0, 1) for url in planned] or \
+                ([(navigation["next_page"], 0, 1)] if navigation.get("next_page") else [])
+            await asyncio.to_thread(self._start_frontier, frontier, entries)
+            while max_pages is None or len(pages) < max_pages:
+                limit = 100 if max_pages is None else min(100, max_pages - len(pages))
+                batch = await asyncio.to_thread(frontier.pop_many, limit)
+                if not batch:
+                    break
+                results = await asyncio.gather(*(self._crawl_page(url, limiter) for url, _ in batch))
+                found = []
+                for (url, depth), data in zip(batch, results):
+                    if data:
+                        pages.append(data)
+                        next_page = None if planned else (data.get("navigation") or {}).get("next_page")
+                        if next_page:
+                            found.append((next_page, 0, depth + 1))
+                await asyncio.to_thread(self._advance_frontier, frontier, batch, found)
+        finally:
+            if frontier is not None:
+                frontier.close()
+            await self.fetcher.aclose()
+
+        self.logger.info(f"Crawled {len(pages)} pages")
+        if self.details:
+            self.logger.info(f"Detail pages: {self.details.progress.as_dict()}")
+        return pages
+
+    def _start_frontier(self, frontier, entries):
+        """Resume an interrupted crawl or start a fresh one, and queue ``entries``."""
+        if len(frontier):
+            # Holding the frontier means whoever leased these pages has exited
+            self.logger.info(f"Resuming crawl with {len(frontier)} pending pages")
+            frontier.release_all()
+        else:
+            frontier.reset()
+        frontier.push(self.url)
+        frontier.done(self.url)
+        frontier.push_many(entries)
+
+    @staticmethod
+    def _advance_frontier(frontier, batch, found):
+        # Queue new links before retiring the batch, so a crash in between only repeats work
+        frontier.push_many(found)
+        for url, _ in batch:
+            # Failed pages are owned by the retry queue from here on
+            frontier.done(url)
+
+    def _open_frontier(self):
+        """Open the persistent frontier for crawls starting at this URL; raises FrontierBusy if it is in use."""
+        settings = self.config.get("frontier") or {}
+        name = "frontier-" + hashlib.sha1(self.url.encode("utf-8")).hexdigest()[:12]
+        return Frontier(
+            self.domain,
+            self.ignore_params,
+            capacity=settings.get("capacity", 1_000_000),
+            error_rate=settings.get("error_rate", 0.001),
+            lease_timeout=settings.get("lease_timeout", 600),
+            name=name
+        )
+
+    async def _crawl_page(self, url, limiter):
+        try:
+            data = await self.extract_page(url, limiter)
+        except Exception as e:
+            self.logger.error(f"Error scraping {url}: {str(e)}")
+            await asyncio.to_thread(self.schedule_retry, classify_error(e), str(e), url)
+            return None
+        await asyncio.to_thread(self._record_page, url, data)
+        if self.on_page:
+            self.on_page(url, data)
+        return data
+
+    def _record_page(self, url, data):
+        self.memory.save_data(data)
+        self.memory.dequeue_retry(url)
+
+    def schedule_retry(self, error_class, message, url=None):
+        """Queue a URL for another attempt, or give up once the policy is exhausted."""
+        url = url or self.url
+        entry = self.memory.get_retry(url) or {}
+        attempts = entry.get("attempts", 0) + 1
+        self.memory.save_failure(error_class, message)
+
+        if self.retry_policy.should_retry(error_class, attempts):
+            delay = self.retry_policy.next_delay(attempts, error_class)
+            self.memory.queue_retry(url, error_class, delay=delay, attempts=attempts, last_error=message)
+            self.logger.info(f"Retry {attempts}/{self.retry_policy.max_attempts} ({error_class}) scheduled in {delay:.1f}s")
+        else:
+            self.memory.dequeue_retry(url)
+            self.logger.warning(f"Giving up on {url} after {attempts} attempt(s) ({error_class})")
+
+    async def drain_retries(self, workers=2):
+        """Run queued retries for this domain as they come due until the queue is empty."""
+        queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                url = await queue.get()
+                try:
+                    await Scraper(url, memory=self.memory, logger=self.logger, config=self.config,
+                                  browser_pool=self.browser_pool).run()
+                except Exception:
+                    pass  # run() has already rescheduled or dropped the URL
+                finally:
+                    queue.task_done()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            while True:
+                next_at = self.memory.next_retry_at()
+                if next_at is None:
+                    break
+                due = self.memory.due_retries()
+                if not due:
+                    await asyncio.sleep(max(next_at - time(), 0.05))
+                    continue
+                self.logger.info(f"Draining {len(due)} queued retries")
+                for url in due:
+                    queue.put_nowait(url)
+                await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     def save_data(self, data):
         """Save extracted data to JSON files."""
@@ -110,14 +441,14 @@ class Scraper:
         with open(os.path.join(memory_dir, 'extracted_data.json'), 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
-        # Save metadata
+        # Save metadata; metadata.json belongs to the memory bank's legacy import
         metadata = {
             'url': self.url,
             'domain': self.domain,
             'scrape_time': datetime.utcnow().isoformat(),
             'version': '1.0'
         }
-        with open(os.path.join(memory_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        with open(os.path.join(memory_dir, 'scrape_metadata.json'), 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
         
     def record_error(self, error_message):
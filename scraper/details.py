@@ -0,0 +1,219 @@
+# scraper/details.py
+
+import asyncio
+import logging
+import weakref
+from dataclasses import dataclass, field
+from time import time
+from typing import Any, Dict, List
+
+from bs4 import BeautifulSoup
+
+from scraper.fetcher import TieredFetcher
+from scraper.rate_limit import RateLimiter
+from scraper.retry import classify_error
+from utils.memory import MemoryBank
+
+# Used when a site config has no detail_selectors block. A field given as
+# a mapping with ``all: true`` collects every match instead of the first.
+DEFAULT_DETAIL_SELECTORS = {
+    'description': [
+        '[itemprop="description"]',
+        'div[class*="description"]',
+        '#description'
+    ],
+    'bid_history': {
+        'selectors': [
+            '[class*="bid-history"] tr',
+            '[class*="bidHistory"] tr',
+            'table[class*="bids"] tr'
+        ],
+        'all': True
+    },
+    'pickup_location': [
+        '[class*="pickup"]',
+        '[class*="location"]'
+    ]
+}
+
+
+@dataclass
+class DetailProgress:
+    total: int = 0
+    cached: int = 0
+    fetched: int = 0
+    failed: int = 0
+    shared: int = 0
+    started_at: float = field(default_factory=time)
+
+    @property
+    def done(self) -> int:
+        return self.cached + self.fetched + self.failed + self.shared
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = max(time() - self.started_at, 1e-9)
+        return {
+            'total': self.total,
+            'cached': self.cached,
+            'fetched': self.fetched,
+            'failed': self.failed,
+            'shared': self.shared,
+            'pending': self.total - self.done,
+            'elapsed_sec': round(elapsed, 2),
+            'fetches_per_sec': round(self.fetched / elapsed, 2)
+        }
+
+
+def _field_spec(spec) -> tuple:
+    if isinstance(spec, dict):
+        return list(spec.get('selectors', [])), bool(spec.get('all'))
+    return list(spec), False
+
+
+def extract_detail(html: str, selectors: Dict[str, Any], soup: BeautifulSoup | None = None) -> Dict[str, Any]:
+    """
+    Extract detail-page fields.
+
+    Args:
+        html: Detail page HTML
+        selectors: Field name to selector list (or ``{selectors, all}``)
+        soup: Already parsed page, to skip parsing ``html`` again
+
+    Returns:
+        Dictionary of field values; fields that matched nothing are omitted
+    """
+    if soup is None:
+        soup = BeautifulSoup(html, 'html.parser')
+    detail = {}
+    for name, spec in selectors.items():
+        candidates, collect_all = _field_spec(spec)
+        for selector in candidates:
+            if collect_all:
+                values = [el.get_text(' ', strip=True) for el in soup.select(selector)]
+                values = [v for v in values if v]
+                if values:
+                    detail[name] = values
+                    break
+            else:
+                found = soup.select_one(selector)
+                if found and found.get_text(strip=True):
+                    detail[name] = found.get_text(' ', strip=True)
+                    break
+    return detail
+
+
+# asyncio primitives belong to one event loop, so the per-domain pools and
+# the fetches in flight are kept per loop, like the rate limiters
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_detail_semaphore(domain: str, concurrency: int) -> asyncio.Semaphore:
+    """Return the semaphore shared by every detail fetch for a domain."""
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(domain)
+    if semaphore is None:
+        semaphore = semaphores[domain] = asyncio.Semaphore(concurrency)
+    return semaphore
+
+
+class DetailEnricher:
+    """
+    Fetch lot detail pages through a bounded pool and merge their fields
+    into the listing records.
+
+    Details already stored in the memory bank are reused, so a crawl only
+    fetches lots it has not seen, and a detail page that several listing
+    pages link to at once is fetched once. Concurrency is capped per domain,
+    across every enricher in the process, by ``detail.concurrency`` on top
+    of the domain's rate limiter.
+    """
+
+    def __init__(
+        self,
+        fetcher: TieredFetcher,
+        memory: MemoryBank,
+        config: Dict[str, Any],
+        limiter: RateLimiter | None = None
+    ):
+        settings = config.get('detail') or {}
+        self.fetcher = fetcher
+        self.memory = memory
+        self.limiter = limiter
+        self.selectors = config.get('detail_selectors') or DEFAULT_DETAIL_SELECTORS
+        self.max_age = settings.get('max_age')
+        self.progress_every = settings.get('progress_every', 50)
+        self.concurrency = settings.get('concurrency', 4)
+        self.domain = memory.domain
+        self.progress = DetailProgress()
+        self.logger = logging.getLogger(__name__)
+
+    async def enrich(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge detail fields into each item that has an item_url, in place."""
+        urls = list(dict.fromkeys(item['item_url'] for item in items if item.get('item_url')))
+        if not urls:
+            return items
+
+        self.progress.total += len(urls)
+        details = await asyncio.to_thread(self.memory.get_details, urls, self.max_age)
+        self.progress.cached += len(details)
+
+        missing = [url for url in urls if url not in details]
+        fetched = await asyncio.gather(*(self._fetch(url) for url in missing))
+        details.update((url, detail) for url, detail in zip(missing, fetched) if detail is not None)
+
+        for item in items:
+            detail = details.get(item.get('item_url'))
+            if not detail:
+                continue
+            # Listing values win; detail pages only fill in what is missing
+            for key, value in detail.items():
+                if item.get(key) in (None, '', []):
+                    item[key] = value
+        return items
+
+    async def _fetch(self, url: str) -> Dict[str, Any] | None:
+        loop = asyncio.get_running_loop()
+        inflight = _inflight.setdefault(loop, {})
+        pending = inflight.get(url)
+        if pending is not None:
+            # Another listing page is already fetching this lot; shield so our
+            # cancellation does not cancel theirs
+            detail = await asyncio.shield(pending)
+            self.progress.shared += 1
+            return detail
+
+        pending = inflight[url] = loop.create_future()
+        detail = None
+        try:
+            detail = await self._fetch_detail(url)
+        finally:
+            inflight.pop(url, None)
+            pending.set_result(detail)
+        return detail
+
+    async def _fetch_detail(self, url: str) -> Dict[str, Any] | None:
+        validate = [s for spec in self.selectors.values() for s in _field_spec(spec)[0]]
+        async with get_detail_semaphore(self.domain, self.concurrency):
+            try:
+                if self.limiter:
+                    async with self.limiter:
+                        result = await self.fetcher.fetch(url, validate)
+                else:
+                    result = await self.fetcher.fetch(url, validate)
+                detail = await asyncio.to_thread(extract_detail, result.html, self.selectors, result.soup)
+            except Exception as e:
+                self.progress.failed += 1
+                self.logger.warning(f"Detail fetch failed for {url} ({classify_error(e)}): {e}")
+                return None
+
+        # An empty result is usually a transient failure (block page, partial
+        # render); storing it would blank the lot for every later run
+        if detail:
+            await asyncio.to_thread(self.memory.save_detail, url, detail)
+        self.progress.fetched += 1
+        if self.progress_every and self.progress.done % self.progress_every == 0:
+            self.logger.info(f"Detail progress: {self.progress.as_dict()}")
+        return detail
@@ -0,0 +1,146 @@
+# scraper/dom_extractor.py
+
+from datetime import datetime
+from typing import Dict, Any, List
+from urllib.parse import urlparse
+
+from scraper.extractor import (
+    DEFAULT_NAVIGATION_SELECTORS,
+    DEFAULT_PAGINATION_SELECTORS,
+    ITEM_FIELD_SELECTORS,
+)
+from scraper.selector_generator import DEFAULT_AUCTION_SELECTORS
+
+# Runs inside the page and mirrors the HTML path (get_valid_auction_selectors
+# followed by Extractor.extract()): same selector order, same first-match
+# rules, same record keys. Only the compact result crosses the Playwright
+# bridge instead of the serialized DOM. Structured data (JSON-LD, microdata,
+# RDFa) is not read here, so lots always come from the CSS selectors.
+EXTRACT_SCRIPT = """
+(args) => {
+    const base = args.url;
+    const absolute = (value) => {
+        if (!value) return null;
+        try { return new URL(value, base).href; } catch (e) { return value; }
+    };
+    const first = (root, selectors) => {
+        for (const sel of selectors) {
+            try {
+                const found = root.querySelector(sel);
+                if (found) return found;
+            } catch (e) {}
+        }
+        return null;
+    };
+    const text = (root, selectors) => {
+        for (const sel of selectors) {
+            let found = null;
+            try { found = root.querySelector(sel); } catch (e) {}
+            if (found && found.textContent.trim()) return found.textContent.trim();
+        }
+        return null;
+    };
+    const attr = (root, selector, name) => {
+        let found = null;
+        try { found = root.querySelector(selector); } catch (e) {}
+        return found && found.hasAttribute(name) ? found.getAttribute(name) : null;
+    };
+    const describe = (el) => el.tagName.toLowerCase() + Array.from(el.attributes)
+        .map((a) => `[${a.name}="${a.value}"]`).join('');
+
+    const result = { auction_data: [], navigation: {}, metadata: {} };
+
+    if (first(document, args.auction_items)) {
+        for (const sel of args.auction_items) {
+            let elements = [];
+            try { elements = document.querySelectorAll(sel); } catch (e) {}
+            if (!elements.length) continue;
+            for (const el of elements) {
+                result.auction_data.push({
+                    title: text(el, args.fields.title),
+                    price: text(el, args.fields.price),
+                    end_time: text(el, args.fields.end_time),
+                    image_url: absolute(attr(el, 'img', 'src')),
+                    item_url: absolute(attr(el, 'a', 'href')),
+                    selector: describe(el)
+                });
+            }
+            break;
+        }
+    }
+
+    if (first(document, args.navigation)) {
+        const nav = { next_page: null, prev_page: null, current_page: 1, total_pages: null };
+        const pagination = args.pagination;
+        const next = first(document, [pagination[0]]);
+        if (next && next.hasAttribute('href')) nav.next_page = absolute(next.getAttribute('href'));
+        const prev = first(document, [pagination[pagination.length - 1]]);
+        if (prev && prev.hasAttribute('href')) nav.prev_page = absolute(prev.getAttribute('href'));
+        const toInt = (el) => {
+            if (!el) return null;
+            const value = el.textContent.trim();
+            return /^[+-]?\\d+$/.test(value) ? parseInt(value, 10) : null;
+        };
+        const current = toInt(document.querySelector('span[class*="current"]'));
+        if (current !== null) nav.current_page = current;
+        const total = toInt(document.querySelector('span[class*="total"]'));
+        if (total !== null) nav.total_pages = total;
+        result.navigation = nav;
+    }
+
+    result.metadata = {
+        title: text(document, ['title']),
+        description: attr(document, 'meta[name="description"]', 'content'),
+        keywords: attr(document, 'meta[name="keywords"]', 'content'),
+        canonical_url: attr(document, 'link[rel="canonical"]', 'href')
+    };
+    return result;
+}
+"""
+
+
+def build_script_args(url: str, custom_selectors: Dict[str, List[str]] | None = None) -> Dict[str, Any]:
+    """
+    Build the argument object passed to EXTRACT_SCRIPT.
+
+    Args:
+        url: Page URL used to resolve relative links
+        custom_selectors: Per-domain selectors, same shape as Extractor's
+
+    Returns:
+        JSON-serializable dictionary of selectors for the page script
+    """
+    # Without custom selectors the HTML path falls back to the selector
+    # generator's candidates (not Extractor's defaults); use the same list
+    custom_selectors = custom_selectors or {}
+    return {
+        'url': url,
+        'auction_items': list(custom_selectors.get('auction_items') or DEFAULT_AUCTION_SELECTORS),
+        'navigation': list(custom_selectors.get('navigation') or DEFAULT_NAVIGATION_SELECTORS),
+        'pagination': list(custom_selectors.get('pagination') or DEFAULT_PAGINATION_SELECTORS),
+        'fields': ITEM_FIELD_SELECTORS
+    }
+
+
+async def extract_in_page(page, url: str, custom_selectors: Dict[str, List[str]] | None = None) -> Dict[str, Any]:
+    """
+    Extract lot records and navigation inside the browser.
+
+    Args:
+        page: Playwright page that has finished loading
+        url: Page URL
+        custom_selectors: Per-domain selectors, same shape as Extractor's
+
+    Returns:
+        Dictionary with the same layout as Extractor.extract(), without
+        ``metadata.structured_data`` and without structured-data lots
+    """
+    result = await page.evaluate(EXTRACT_SCRIPT, build_script_args(url, custom_selectors))
+    result['metadata']['domain'] = urlparse(url).netloc
+    return {
+        'url': url,
+        'timestamp': datetime.utcnow().isoformat(),
+        'auction_data': result['auction_data'],
+        'navigation': result['navigation'],
+        'metadata': result['metadata']
+    }
@@ -1,25 +1,77 @@
 # scraper/extractor.py
 
 from bs4 import BeautifulSoup
-import json
 import re
 from datetime import datetime
 import logging
 from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urljoin, urlparse
 
+from scraper.selector_generator import DEFAULT_AUCTION_SELECTORS
+from scraper.structured_data import extract_structured_data, lots_from_structured_data
+
+# DEFAULT_AUCTION_SELECTORS comes from selector_generator so the HTML path, the
+# in-browser path (scraper/dom_extractor.py) and the fetcher try the same list.
+
+DEFAULT_NAVIGATION_SELECTORS = [
+    'nav',
+    'ul[class*="pagination"]',
+    'div[class*="pagination"]',
+    'a[class*="next"]',
+    'a[class*="prev"]'
+]
+
+DEFAULT_PAGINATION_SELECTORS = ['a[class*="next"]', 'a[class*="prev"]']
+
+ITEM_FIELD_SELECTORS = {
+    'title': [
+        'h1', 'h2', 'h3', 'h4',
+        'div[class*="title"]',
+        'div[class*="name"]'
+    ],
+    'price': [
+        'span[class*="price"]',
+        'div[class*="price"]',
+        'span[class*="amount"]'
+    ],
+    'end_time': [
+        'div[class*="end-time"]',
+        'div[class*="countdown"]',
+        'span[class*="time"]'
+    ]
+}
+
 class Extractor:
-    def __init__(self, html: str, url: str, custom_selectors: Dict[str, List[str]] | None = None):
+    def __init__(
+        self,
+        html: str,
+        url: str,
+        custom_selectors: Dict[str, List[str]] | None = None,
+        use_structured_data: bool = True,
+        soup: BeautifulSoup | None = None
+    ):
         self.html = html
         self.url = url
-        self.soup = BeautifulSoup(html, 'html.parser')
+        # Callers that already parsed the page (the HTTP tier) pass their soup in
+        self.soup = soup if soup is not None else BeautifulSoup(html, 'html.parser')
         self.logger = logging.getLogger(__name__)
         self.custom_selectors = custom_selectors or {}
+        self.use_structured_data = use_structured_data
+        self._structured_data = None
 
     async def extract(self) -> Dict[str, Any]:
         """
         Extract all data from the page.
         
+        Returns:
+            Dictionary containing extracted data
+        """
+        return self.extract_sync()
+
+    def extract_sync(self) -> Dict[str, Any]:
+        """
+        Blocking form of extract(), for running in a worker thread.
+
         Returns:
             Dictionary containing extracted data
         """
@@ -31,9 +83,16 @@ class Extractor:
             'metadata': {}
         }
 
-        # Extract auction data
-        if self._has_auction_data():
-            data['auction_data'] = await self._extract_auction_data()
+        # Extract auction data. Product/Offer structured data is preferred only
+        # when it covers the page, not for an incidental product block
+        structured_lots = []
+        if self.use_structured_data:
+            structured_lots = lots_from_structured_data(self._structured(), self.url)
+        elements = self._lot_elements()
+        if structured_lots and len(structured_lots) >= len(elements):
+            data['auction_data'] = structured_lots
+        elif elements:
+            data['auction_data'] = self._items_from_elements(elements)
 
         # Extract navigation
         if self._has_navigation():
@@ -47,12 +106,7 @@ class Extractor:
     def _has_auction_data(self) -> bool:
         """Check if page contains auction data."""
         # Look for common auction item selectors
-        selectors = self.custom_selectors.get('auction_items', [
-            'div[class*="lot"]',
-            'div[class*="auction-item"]',
-            'div[class*="product"]',
-            'div[data-lot-id]'
-        ])
+        selectors = self.custom_selectors.get('auction_items', DEFAULT_AUCTION_SELECTORS)
         
         for selector in selectors:
             if self.soup.select_one(selector):
@@ -62,13 +116,7 @@ class Extractor:
     def _has_navigation(self) -> bool:
         """Check if page contains navigation elements."""
         # Look for common navigation selectors
-        selectors = self.custom_selectors.get('navigation', [
-            'nav',
-            'ul[class*="pagination"]',
-            'div[class*="pagination"]',
-            'a[class*="next"]',
-            'a[class*="prev"]'
-        ])
+        selectors = self.custom_selectors.get('navigation', DEFAULT_NAVIGATION_SELECTORS)
         
         for selector in selectors:
             if self.soup.select_one(selector):
@@ -82,25 +130,23 @@ class Extractor:
         Returns:
             List of dictionaries containing auction item data
         """
-        items = []
-        
-        # Try different selectors for auction items
-        selectors = self.custom_selectors.get('auction_items', [
-            'div[class*="lot"]',
-            'div[class*="auction-item"]',
-            'div[class*="product"]',
-            'div[data-lot-id]'
-        ])
-        
+        return self._items_from_elements(self._lot_elements())
+
+    def _lot_elements(self) -> list:
+        """Return the elements matched by the first auction item selector that matches."""
+        selectors = self.custom_selectors.get('auction_items', DEFAULT_AUCTION_SELECTORS)
         for selector in selectors:
             elements = self.soup.select(selector)
             if elements:
-                for element in elements:
-                    item = self._extract_item_data(element)
-                    if item:
-                        items.append(item)
-                break
-        
+                return elements
+        return []
+
+    def _items_from_elements(self, elements) -> List[Dict[str, Any]]:
+        items = []
+        for element in elements:
+            item = self._extract_item_data(element)
+            if item:
+                items.append(item)
         return items
 
     def _extract_item_data(self, element) -> Optional[Dict[str, Any]]:
@@ -115,25 +161,13 @@ class Extractor:
         """
         try:
             # Extract title
-            title = self._safe_extract_text(element, [
-                'h1', 'h2', 'h3', 'h4',
-                'div[class*="title"]',
-                'div[class*="name"]'
-            ])
+            title = self._safe_extract_text(element, ITEM_FIELD_SELECTORS['title'])
             
             # Extract price
-            price = self._safe_extract_text(element, [
-                'span[class*="price"]',
-                'div[class*="price"]',
-                'span[class*="amount"]'
-            ])
+            price = self._safe_extract_text(element, ITEM_FIELD_SELECTORS['price'])
             
             # Extract end time
-            end_time = self._safe_extract_text(element, [
-                'div[class*="end-time"]',
-                'div[class*="countdown"]',
-                'span[class*="time"]'
-            ])
+            end_time = self._safe_extract_text(element, ITEM_FIELD_SELECTORS['end_time'])
             
             # Extract image URL
             img_url = self._safe_extract_attr(element, 'img', 'src')
@@ -151,13 +185,21 @@ class Extractor:
                 'end_time': end_time,
                 'image_url': img_url,
                 'item_url': item_url,
-                'selector': element.name + ''.join(f'[{k}="{v}"]' for k, v in element.attrs.items())
+                'selector': self._describe(element)
             }
             
         except Exception as e:
             self.logger.error(f"Error extracting item data: {str(e)}")
             return None
 
+    @staticmethod
+    def _describe(element) -> str:
+        """Render an element as tag[attr="value"]..., matching the in-browser path."""
+        # bs4 keeps multi-valued attributes such as class as lists
+        return element.name + ''.join(
+            f'[{k}="{" ".join(v) if isinstance(v, list) else v}"]' for k, v in element.attrs.items()
+        )
+
     def _extract_navigation(self) -> Dict[str, Any]:
         """
         Extract navigation data.
@@ -173,7 +215,7 @@ class Extractor:
         }
         
         # Extract next page URL
-        pagination_selectors = self.custom_selectors.get('pagination', ['a[class*="next"]', 'a[class*="prev"]'])
+        pagination_selectors = self.custom_selectors.get('pagination', DEFAULT_PAGINATION_SELECTORS)
         next_link = self.soup.select_one(pagination_selectors[0])
         if next_link and 'href' in next_link.attrs:
             nav_data['next_page'] = urljoin(self.url, next_link['href'])
@@ -223,36 +265,22 @@ class Extractor:
         
         return metadata
 
+    def _structured(self) -> Dict[str, List[Any]]:
+        """Parse JSON-LD, microdata and RDFa once per document."""
+        if self._structured_data is None:
+            self._structured_data = extract_structured_data(self.soup, self.url)
+        return self._structured_data
+
     def _extract_structured_data(self) -> Optional[Dict[str, Any]]:
         """
-        Extract structured data from JSON-LD or microdata.
+        Extract structured data from JSON-LD, microdata and RDFa.
         
         Returns:
-            Dictionary containing structured data or None if not found
+            Dictionary with 'json-ld', 'microdata' and 'rdfa' lists, or None if
+            the page has none
         """
-        # Try JSON-LD
-        json_ld = self.soup.select_one('script[type="application/ld+json"]')
-        if json_ld:
-            try:
-                return json.loads(json_ld.string)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        
-        # Try microdata
-        microdata = {}
-        for item in self.soup.select('[itemtype]'):
-            item_type = item.get('itemtype', '').split('/')[-1]
-            item_props = {}
-            
-            for prop in item.select('[itemprop]'):
-                prop_name = prop.get('itemprop')
-                prop_value = prop.get('content') or prop.text.strip()
-                item_props[prop_name] = prop_value
-            
-            if item_props:
-                microdata[item_type] = item_props
-        
-        return microdata if microdata else None
+        structured = self._structured()
+        return structured if any(structured.values()) else None
 
     def _safe_extract_text(self, element, selectors: List[str]) -> Optional[str]:
         """
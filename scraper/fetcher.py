@@ -0,0 +1,222 @@
+# scraper/fetcher.py
+
+import asyncio
+import importlib.util
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+
+from scraper.config_manager import update_domain_config
+from scraper.selector_generator import DEFAULT_AUCTION_SELECTORS
+from scraper.selector_validator import validate_selectors
+from scraper.session_store import SessionStore, AUTH_FAILURE_STATUSES, is_auth_redirect
+from utils.classify import page_template  # noqa: F401 - part of this module's API
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
+
+# HTTP/2 and brotli need optional extras (h2, brotli); fall back quietly.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+BROTLI_AVAILABLE = any(importlib.util.find_spec(m) for m in ("brotli", "brotlicffi"))
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+# Errors the browser would get too: raise them instead of escalating
+NO_ESCALATE_STATUSES = {404, 410, 429}
+
+_APP_SHELL_RE = re.compile(
+    r'<(?:div|main)[^>]*\bid=["\'](?:root|app|__next|__nuxt|svelte)["\'][^>]*>\s*</(?:div|main)>',
+    re.IGNORECASE
+)
+_NOSCRIPT_RE = re.compile(r'<noscript[^>]*>[^<]*(?:enable|requires?|turn on)\s+javascript', re.IGNORECASE)
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style|template)\b[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class FetchError(Exception):
+    """Raised when a fetch returns an HTTP error status."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    status: int
+    tier: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Parsed page, when the fetcher already had to parse it to validate selectors
+    soup: BeautifulSoup | None = field(default=None, repr=False, compare=False)
+
+
+def _timeout_seconds(value) -> float:
+    # Config ``timeouts`` are always in milliseconds, as Playwright takes them.
+    return value / 1000
+
+
+def looks_js_rendered(html: str) -> bool:
+    """Return True if the response is an app shell that needs a browser."""
+    if not html:
+        return True
+    if _APP_SHELL_RE.search(html) or _NOSCRIPT_RE.search(html):
+        return True
+    text = _TAG_RE.sub(' ', _SCRIPT_STYLE_RE.sub(' ', html))
+    return len(text.split()) < 50 and '<script' in html.lower()
+
+
+class HttpFetcher:
+    """Pooled async HTTP client (keep-alive, HTTP/2, compressed transfer)."""
+
+    def __init__(self, timeout: float = 30.0, max_connections: int = 20, session: SessionStore | None = None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.session = session
+        self.session_version = -1
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            encodings = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+            self.client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                    "Accept-Encoding": encodings,
+                    "Accept-Language": "en-US,en;q=0.9"
+                }
+            )
+        if self.session and self.session_version != self.session.version:
+            # Pick up cookies the browser saved since the client was built
+            self.client.cookies = self.session.httpx_cookies()
+            self.session_version = self.session.version
+        return self.client
+
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch a URL, raising FetchError on HTTP error statuses."""
+        client = self._client()
+        response = await client.get(url)
+        if self.session:
+            if response.history and is_auth_redirect(str(response.url)):
+                self.session.invalidate(f"redirected to {response.url}")
+            elif response.cookies:
+                self.session.merge_cookies(client.cookies)
+                self.session_version = self.session.version
+        if response.status_code >= 400:
+            if self.session and response.status_code in AUTH_FAILURE_STATUSES:
+                # Invalidate here: the tiered fetcher swallows this error when it escalates
+                self.session.invalidate(f"HTTP {response.status_code} for {url}")
+            raise FetchError(url, response.status_code)
+        return FetchResult(
+            url=str(response.url),
+            html=response.text,
+            status=response.status_code,
+            tier=TIER_HTTP,
+            headers=dict(response.headers)
+        )
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class TieredFetcher:
+    """
+    Fetch pages over plain HTTP first and escalate to the browser only when
+    the lot selectors do not match or the page is an app shell.
+
+    The tier that worked is learned per page template and stored in the
+    site config under ``fetch_tiers`` so later runs go straight to it.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        config: Dict,
+        render: Callable[[str, List[str]], Awaitable[Tuple[str, int]]],
+        http: HttpFetcher | None = None,
+        session: SessionStore | None = None
+    ):
+        self.url = url
+        self.config = config
+        self.render = render
+        self.http = http or HttpFetcher(
+            timeout=_timeout_seconds(config.get("timeouts", {}).get("page_load", 30000)),
+            session=session
+        )
+        self.enable_dynamic = config.get("enable_dynamic", True)
+        self.tiers: Dict[str, str] = dict(config.get("fetch_tiers") or {})
+        self.logger = logging.getLogger(__name__)
+
+    async def fetch(self, url: str, selectors: Iterable[str] | None = None) -> FetchResult:
+        """
+        Fetch a page through the cheapest tier that yields lot data.
+
+        Args:
+            url: Page URL
+            selectors: Candidate auction item selectors used to validate
+                the HTTP response, and waited for when the page is rendered
+
+        Returns:
+            FetchResult with the HTML and the tier that produced it
+
+        Raises:
+            FetchError: On 404, 410, 429 and 5xx responses, which are not
+                escalated to the browser
+        """
+        candidates: List[str] = list(selectors or DEFAULT_AUCTION_SELECTORS)
+        template = page_template(url)
+        learned = self.tiers.get(template)
+
+        if not self.enable_dynamic:
+            return await self.http.fetch(url)
+
+        # Only a page that loaded but lacked lots says the template needs a browser
+        learn = True
+        if learned != TIER_BROWSER:
+            try:
+                result = await self.http.fetch(url)
+            except (httpx.HTTPError, FetchError) as e:
+                if isinstance(e, FetchError) and (e.status in NO_ESCALATE_STATUSES or e.status >= 500):
+                    raise
+                self.logger.info(f"HTTP fetch failed for {url}, escalating: {e}")
+                learn = False
+            else:
+                result.soup = await asyncio.to_thread(BeautifulSoup, result.html, "html.parser")
+                if validate_selectors(result.html, candidates, result.soup) and not looks_js_rendered(result.html):
+                    self._learn(template, TIER_HTTP)
+                    return result
+                self.logger.info(f"No lot selectors matched over HTTP for {template}, escalating")
+
+        html, status = await self.render(url, candidates)
+        if learn:
+            self._learn(template, TIER_BROWSER)
+        return FetchResult(url=url, html=html, status=status, tier=TIER_BROWSER)
+
+    def _learn(self, template: str, tier: str):
+        if self.tiers.get(template) == tier:
+            return
+        self.tiers[template] = tier
+        self.config["fetch_tiers"] = dict(self.tiers)
+        try:
+            update_domain_config(self.url, "fetch_tiers", self.tiers)
+        except OSError as e:
+            self.logger.warning(f"Could not persist fetch tier for {template}: {e}")
+
+    async def aclose(self):
+        await self.http.aclose()
@@ -0,0 +1,285 @@
+# scraper/frontier.py
+
+import os
+import re
+import mmap
+import math
+import struct
+import sqlite3
+import hashlib
+from time import time
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_ESCAPE_RE = re.compile(r'%([0-9a-fA-F]{2})')
+_UNRESERVED = set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def _normalize_escape(match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def canonicalize_url(url: str, ignore_params: Iterable[str] = ()) -> str:
+    """
+    Reduce a URL to a canonical form for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and any ``ignore_params``, sorts the remaining query keys
+    and normalizes percent-encoding of the path.
+    """
+    ignore = {p.lower() for p in ignore_params}
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    port = parts.port
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    if parts.username is not None:
+        # Keep the whole userinfo: dropping only the password would change the resource
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    # Decode escaped unreserved characters, upper-case the rest, escape raw ones
+    path = quote(_ESCAPE_RE.sub(_normalize_escape, parts.path), safe="/:@!$&'()*+,;=-._~%") or '/'
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+        and not k.lower().startswith(TRACKING_PREFIXES)
+        and k.lower() not in ignore
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """
+    Fixed-size, file-backed Bloom filter for seen-URL checks.
+
+    The bit array is memory-mapped from ``path`` so it persists across
+    restarts and its footprint is set by ``capacity``/``error_rate`` rather
+    than by the number of URLs seen.
+    """
+
+    HEADER = struct.Struct('<4sQII')  # magic, bits, hashes, reserved
+    MAGIC = b'BLM1'
+
+    def __init__(self, path: str, capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                magic, bits, hashes, _ = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != self.MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+        else:
+            bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            bits += -bits % 8
+            hashes = max(1, round(bits / capacity * math.log(2)))
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, bits, hashes, 0))
+                f.truncate(self.HEADER.size + bits // 8)
+        self.bits = bits
+        self.hashes = hashes
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def __contains__(self, item: str) -> bool:
+        offset = self.HEADER.size
+        return all(self._map[offset + p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add an item; return True if it was not (probably) present before."""
+        offset = self.HEADER.size
+        added = False
+        for p in self._positions(item):
+            index = offset + p // 8
+            mask = 1 << (p % 8)
+            if not self._map[index] & mask:
+                self._map[index] |= mask
+                added = True
+        return added
+
+    def clear(self):
+        """Forget every item."""
+        offset = self.HEADER.size
+        self._map[offset:] = bytes(len(self._map) - offset)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+
+class FrontierBusy(RuntimeError):
+    """Raised when another crawl already has the frontier open."""
+
+
+def _lock_file(path: str):
+    """
+    Open ``path`` and lock it exclusively without waiting.
+
+    The lock belongs to the open file, so a second Frontier on the same
+    files is refused even within one process, and the OS drops the lock
+    when its owner exits or crashes.
+    """
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        raise FrontierBusy(f"{path} is held by another crawl")
+    return f
+
+
+class Frontier:
+    """
+    Persistent, deduplicating URL frontier for large crawls.
+
+    URLs are canonicalized, checked against a file-backed Bloom filter and
+    kept in an SQLite priority queue (lower ``priority`` pops first), so
+    only the filter's fixed-size bit array and SQLite's page cache live in
+    RAM. Popped URLs are leased until ``done()``; leases older than
+    ``lease_timeout`` are handed out again, so an interrupted crawl resumes
+    where it stopped. ``name`` picks the files under ``memory/<domain>/``,
+    so separate crawls of one domain can keep separate frontiers. Only one
+    Frontier may have the files open at a time; opening them again raises
+    FrontierBusy until the first is closed.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        ignore_params: Iterable[str] = (),
+        capacity: int = 10_000_000,
+        error_rate: float = 0.001,
+        lease_timeout: float = 600,
+        name: str = "frontier"
+    ):
+        self.domain = domain.replace("www.", "")
+        self.dir = os.path.join("memory", self.domain)
+        os.makedirs(self.dir, exist_ok=True)
+        self.ignore_params = tuple(ignore_params)
+        self.lease_timeout = lease_timeout
+        self._owner = _lock_file(os.path.join(self.dir, f"{name}.lock"))
+        self.seen = BloomFilter(os.path.join(self.dir, f"{name}.bloom"), capacity, error_rate)
+        self.db = sqlite3.connect(os.path.join(self.dir, f"{name}.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                priority REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                leased_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS frontier_next ON frontier (leased_at, priority, seq);
+        """)
+        self._seq = self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM frontier").fetchone()[0]
+
+    def canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, self.ignore_params)
+
+    def push(self, url: str, priority: float = 0, depth: int = 0, force: bool = False) -> bool:
+        """Queue a URL unless it has been seen before; return True if it was queued."""
+        return self.push_many([(url, priority, depth)], force) == 1
+
+    def push_many(self, entries: Iterable[Tuple[str, float, int]], force: bool = False) -> int:
+        """Queue ``(url, priority, depth)`` entries in one transaction; return how many were new."""
+        rows = []
+        batch = set()
+        for url, priority, depth in entries:
+            url = self.canonicalize(url)
+            if url in batch or (url in self.seen and not force):
+                continue
+            batch.add(url)
+            self._seq += 1
+            rows.append((url, priority, self._seq, depth))
+        if rows:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, priority, seq, depth) VALUES (?, ?, ?, ?)", rows
+            )
+            self.db.commit()
+            # Only mark URLs seen once they are safely queued; a crash in
+            # between must not leave a URL seen but never crawled
+            for url, *_ in rows:
+                self.seen.add(url)
+        return len(rows)
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Lease the highest-priority URL; return ``(url, depth)`` or None if empty."""
+        batch = self.pop_many(1)
+        return batch[0] if batch else None
+
+    def pop_many(self, count: int) -> List[Tuple[str, int]]:
+        now = time()
+        self.db.execute(
+            "UPDATE frontier SET leased_at = NULL WHERE leased_at IS NOT NULL AND leased_at < ?",
+            (now - self.lease_timeout,)
+        )
+        rows = self.db.execute(
+            "SELECT url, depth FROM frontier WHERE leased_at IS NULL ORDER BY priority, seq LIMIT ?", (count,)
+        ).fetchall()
+        self.db.executemany("UPDATE frontier SET leased_at = ? WHERE url = ?", [(now, url) for url, _ in rows])
+        self.db.commit()
+        return rows
+
+    def done(self, url: str):
+        """Remove a leased URL once it has been processed."""
+        self.db.execute("DELETE FROM frontier WHERE url = ?", (self.canonicalize(url),))
+        self.db.commit()
+
+    def release(self, url: str):
+        """Return a leased URL to the queue without processing it."""
+        self.db.execute("UPDATE frontier SET leased_at = NULL WHERE url = ?", (self.canonicalize(url),))
+        self.db.commit()
+
+    def release_all(self):
+        """Return every leased URL to the queue, e.g. when resuming after a crash."""
+        self.db.execute("UPDATE frontier SET leased_at = NULL WHERE leased_at IS NOT NULL")
+        self.db.commit()
+
+    def reset(self):
+        """Forget every queued and seen URL."""
+        self.db.execute("DELETE FROM frontier")
+        self.db.commit()
+        self.seen.clear()
+        self._seq = 0
+
+    def __contains__(self, url: str) -> bool:
+        return self.canonicalize(url) in self.seen
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def close(self):
+        self.seen.close()
+        self.db.close()
+        self._owner.close()
@@ -0,0 +1,251 @@
+# scraper/normalize.py
+
+"""Batch normalization of raw lot fields into typed records."""
+import re
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone, tzinfo
+from time import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+try:
+    from dateutil import parser as dateutil_parser
+except ImportError:
+    dateutil_parser = None
+
+# Sentinel stored in the integer columns when a field could not be parsed
+MISSING = -1
+
+# Digits with optional thousands groups and a decimal part, e.g. 1,234.56 / 1.234,56 / 1 234,56
+_NUMBER = r"\d+(?:[.,\u00a0\u202f' ]\d{3})*(?:[.,]\d+)?"
+_NUMBER_RE = re.compile(_NUMBER)
+_COMMA_DECIMAL_RE = re.compile(r"\d,\d{2}(?!\d)")
+_DOT_DECIMAL_RE = re.compile(r"\d\.\d{2}(?!\d)")
+_CODE_RE = re.compile(r"\b(USD|EUR|GBP|CAD|AUD|JPY|CHF|NZD|MXN)\b")
+_SYMBOLS = (("C$", "CAD"), ("CA$", "CAD"), ("A$", "AUD"), ("NZ$", "NZD"),
+            ("$", "USD"), ("€", "EUR"), ("£", "GBP"), ("¥", "JPY"))
+_CURRENCY = r"(?:[$€£¥]|\b(?:USD|EUR|GBP|CAD|AUD|JPY|CHF|NZD|MXN)\b)"
+# The amount next to a currency symbol or code, so "12 bids $5.00" reads 5.00
+_PRICE_RE = re.compile(rf"{_CURRENCY}\s*({_NUMBER})|({_NUMBER})\s*{_CURRENCY}")
+_COUNTDOWN_RE = re.compile(
+    r"(\d+)\s*(d(?:ays?)?|h(?:(?:ou)?rs?)?|m(?:in(?:ute)?s?)?|s(?:ec(?:ond)?s?)?)\b", re.IGNORECASE
+)
+_CLOCK_RE = re.compile(r"^\s*(?:(\d+):)?(\d{1,2}):(\d{2})\s*$")
+_PREFIX_RE = re.compile(r"^\s*(?:ends?|ending|closes?|closing)(?:\s+on|\s+at)?\s*:?\s*", re.IGNORECASE)
+_UNIT_SECONDS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+_DATE_FORMATS = (
+    "%b %d %I:%M %p", "%B %d %I:%M %p",
+    "%b %d, %Y %I:%M %p", "%B %d, %Y %I:%M %p",
+    "%m/%d/%Y %I:%M %p", "%m/%d/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
+)
+
+_profiles: Dict[tuple, "DomainProfile"] = {}
+
+
+class AuctionLot(NamedTuple):
+    title: Optional[str]
+    price_cents: Optional[int]
+    currency: Optional[str]
+    end_time: Optional[int]
+    image: Optional[str]
+    url: Optional[str]
+
+
+@dataclass(frozen=True)
+class DomainProfile:
+    currency: Optional[str] = None
+    decimal_sep: str = "."
+    tz: tzinfo = timezone.utc
+
+    def thousands_table(self):
+        """str.translate table that drops grouping characters."""
+        grouping = ",'. \u00a0\u202f".replace(self.decimal_sep, "")
+        return str.maketrans("", "", grouping)
+
+
+def _resolve_tz(name) -> tzinfo:
+    if isinstance(name, tzinfo):
+        return name
+    if name and ZoneInfo is not None:
+        return ZoneInfo(name)
+    return timezone.utc
+
+
+def detect_profile(prices: Iterable[Optional[str]], tz=None) -> DomainProfile:
+    """Detect currency and decimal separator from a sample of price strings."""
+    currency = None
+    comma = dot = 0
+    for text in prices:
+        if not text:
+            continue
+        if currency is None:
+            match = _CODE_RE.search(text)
+            if match:
+                currency = match.group(1)
+            else:
+                currency = next((code for symbol, code in _SYMBOLS if symbol in text), None)
+        comma += bool(_COMMA_DECIMAL_RE.search(text))
+        dot += bool(_DOT_DECIMAL_RE.search(text))
+    return DomainProfile(currency=currency, decimal_sep="," if comma > dot else ".", tz=_resolve_tz(tz))
+
+
+def get_profile(domain: str, prices: Iterable[Optional[str]], tz=None) -> DomainProfile:
+    """
+    Return the cached profile for a domain and timezone, detecting it on first use.
+
+    A sample without a single price (an empty page, a block page) is
+    detected but not cached, so it cannot fix the wrong profile on the
+    domain for the rest of the process.
+    """
+    key = (domain, tz)
+    profile = _profiles.get(key)
+    if profile is None:
+        prices = [text for text in prices if text and _NUMBER_RE.search(text)]
+        profile = detect_profile(prices, tz)
+        if prices:
+            _profiles[key] = profile
+    return profile
+
+
+def _parse_absolute(text: str, now: float, tz: tzinfo) -> int:
+    text = _PREFIX_RE.sub("", text).strip()
+    parsed = None
+    for fmt in _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+            break
+        except ValueError:
+            continue
+    if parsed is None:
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            if dateutil_parser is None:
+                return MISSING
+            try:
+                # Missing fields (date, weekday-relative day) come from the injected now
+                default = datetime.fromtimestamp(now, tz).replace(
+                    tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+                )
+                parsed = dateutil_parser.parse(text, fuzzy=True, default=default)
+            except (ValueError, OverflowError):
+                return MISSING
+
+    if parsed.tzinfo is None:
+        if parsed.year == 1900:
+            # No year in the text: take the next occurrence of that date
+            parsed = parsed.replace(year=datetime.fromtimestamp(now, tz).year)
+            if parsed.replace(tzinfo=tz).timestamp() < now - 86400:
+                parsed = parsed.replace(year=parsed.year + 1)
+        parsed = parsed.replace(tzinfo=tz)
+    return int(parsed.timestamp())
+
+
+class LotBatch:
+    """
+    A page of lots in columnar form.
+
+    Prices are integer cents and end times are UTC epoch seconds, stored in
+    ``array('q')`` columns with MISSING for fields that could not be parsed.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], profile: DomainProfile, now: float | None = None):
+        now = time() if now is None else now
+        self.currency = profile.currency
+        self.titles = [item.get("title") for item in items]
+        self.images = [item.get("image_url") for item in items]
+        self.urls = [item.get("item_url") for item in items]
+        self.price_cents = self._prices([item.get("price") for item in items], profile)
+        self.end_times = self._end_times([item.get("end_time") for item in items], profile, now)
+
+    def __len__(self):
+        return len(self.titles)
+
+    @staticmethod
+    def _prices(texts: List[Optional[str]], profile: DomainProfile) -> array:
+        out = array("q", [MISSING]) * len(texts)
+        table = profile.thousands_table()
+        comma_decimal = profile.decimal_sep == ","
+        price_search = _PRICE_RE.search
+        number_search = _NUMBER_RE.search
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            match = price_search(text)
+            if match:
+                number = match.group(1) or match.group(2)
+            else:
+                match = number_search(text)
+                if not match:
+                    continue
+                number = match.group()
+            number = number.translate(table)
+            if comma_decimal:
+                number = number.replace(",", ".")
+            whole, _, frac = number.rstrip(".").partition(".")
+            try:
+                out[i] = int(whole or 0) * 100 + int((frac + "00")[:2])
+            except ValueError:
+                continue
+        return out
+
+    @staticmethod
+    def _end_times(texts: List[Optional[str]], profile: DomainProfile, now: float) -> array:
+        out = array("q", [MISSING]) * len(texts)
+        base = int(now)
+        absolute: Dict[str, int] = {}
+        findall = _COUNTDOWN_RE.findall
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            parts = findall(text)
+            if parts:
+                out[i] = base + sum(int(n) * _UNIT_SECONDS[unit[0].lower()] for n, unit in parts)
+                continue
+            clock = _CLOCK_RE.match(text)
+            if clock:
+                hours, minutes, seconds = clock.groups()
+                out[i] = base + int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+                continue
+            # Lots on a page usually share a handful of closing times
+            value = absolute.get(text)
+            if value is None:
+                value = absolute[text] = _parse_absolute(text, now, profile.tz)
+            out[i] = value
+        return out
+
+    def records(self) -> List[AuctionLot]:
+        """Return the batch as typed records, with None for unparsed fields."""
+        currency = self.currency
+        return [
+            AuctionLot(title, None if cents == MISSING else cents, currency,
+                       None if end == MISSING else end, image, url)
+            for title, cents, end, image, url
+            in zip(self.titles, self.price_cents, self.end_times, self.images, self.urls)
+        ]
+
+    def to_numpy(self):
+        """Return the numeric columns as NumPy arrays (requires numpy)."""
+        import numpy as np
+        return {
+            "price_cents": np.frombuffer(self.price_cents, dtype=np.int64),
+            "end_time": np.frombuffer(self.end_times, dtype=np.int64)
+        }
+
+
+def normalize_lots(
+    items: List[Dict[str, Any]],
+    domain: str | None = None,
+    tz=None,
+    now: float | None = None
+) -> LotBatch:
+    """Normalize one page of raw lot dicts (Extractor output) as a batch."""
+    prices = (item.get("price") for item in items[:50])
+    profile = get_profile(domain, prices, tz) if domain else detect_profile(prices, tz)
+    return LotBatch(items, profile, now)
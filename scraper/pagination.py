@@ -0,0 +1,175 @@
+# scraper/pagination.py
+
+"""Infer listing page URL templates and plan page fan-out."""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+_NUMBERED_SEGMENT_RE = re.compile(r'^(\D*?)(\d+)(\D*)$')
+_PAGE_WORDS = {'page', 'p', 'pg', 'seite', 'pagina'}
+
+
+@dataclass
+class PageTemplate:
+    """
+    URL template for numbered listing pages.
+
+    The page number (or offset) lives either in query parameter ``key`` or
+    in path segment ``index``; page ``n`` maps to
+    ``anchor_value + (n - anchor_page) * step``.
+    """
+    base: str
+    kind: str
+    anchor_page: int
+    anchor_value: int
+    step: int
+    key: Optional[str] = None
+    index: Optional[int] = None
+    prefix: str = ''
+    suffix: str = ''
+
+    def url_for(self, page: int) -> str:
+        value = self.anchor_value + (page - self.anchor_page) * self.step
+        parsed = urlparse(self.base)
+        if self.kind == 'query':
+            query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k != self.key]
+            query.append((self.key, str(value)))
+            return urlunparse(parsed._replace(query=urlencode(query)))
+        segments = parsed.path.split('/')
+        segments[self.index] = f"{self.prefix}{value}{self.suffix}"
+        return urlunparse(parsed._replace(path='/'.join(segments)))
+
+    def value_in(self, url: str) -> Optional[int]:
+        """Return the page parameter (or path number) carried by ``url``, if any."""
+        parsed = urlparse(url)
+        if self.kind == 'query':
+            return _to_int(dict(parse_qsl(parsed.query)).get(self.key))
+        segments = parsed.path.rstrip('/').split('/')
+        if self.index >= len(segments):
+            return None
+        match = _NUMBERED_SEGMENT_RE.match(segments[self.index])
+        if not match or match.group(1, 3) != (self.prefix, self.suffix):
+            return None
+        return int(match.group(2))
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _same_url(a: str, b: str) -> bool:
+    a, b = urlparse(a), urlparse(b)
+    return (a.netloc, a.path.rstrip('/'), sorted(parse_qsl(a.query))) == \
+        (b.netloc, b.path.rstrip('/'), sorted(parse_qsl(b.query)))
+
+
+def _query_template(current, nxt, current_page) -> Optional[PageTemplate]:
+    cur_q = dict(parse_qsl(current.query, keep_blank_values=True))
+    next_q = dict(parse_qsl(nxt.query, keep_blank_values=True))
+    changed = [k for k in set(cur_q) | set(next_q) if cur_q.get(k) != next_q.get(k)]
+    if len(changed) != 1:
+        return None
+    key = changed[0]
+    next_value = _to_int(next_q.get(key))
+    if next_value is None:
+        return None
+    cur_value = _to_int(cur_q.get(key))
+    if key in cur_q and cur_value is None:
+        return None
+    if cur_value is not None:
+        step = next_value - cur_value
+    else:
+        # First page omits the parameter: either a page number or an offset from 0
+        step = 1 if next_value == current_page + 1 else next_value
+    if step <= 0:
+        return None
+    return PageTemplate(base=urlunparse(nxt), kind='query', key=key,
+                        anchor_page=current_page + 1, anchor_value=next_value, step=step)
+
+
+def _path_template(current, nxt, current_page) -> Optional[PageTemplate]:
+    cur_segments = current.path.rstrip('/').split('/')
+    next_segments = nxt.path.rstrip('/').split('/')
+
+    if len(next_segments) == len(cur_segments):
+        diffs = [i for i, (a, b) in enumerate(zip(cur_segments, next_segments)) if a != b]
+        if len(diffs) != 1:
+            return None
+        index = diffs[0]
+        cur_match = _NUMBERED_SEGMENT_RE.match(cur_segments[index])
+        next_match = _NUMBERED_SEGMENT_RE.match(next_segments[index])
+        if not cur_match or not next_match or cur_match.group(1, 3) != next_match.group(1, 3):
+            return None
+        step = int(next_match.group(2)) - int(cur_match.group(2))
+    elif next_segments[:len(cur_segments)] == cur_segments and 1 <= len(next_segments) - len(cur_segments) <= 2:
+        # /catalog -> /catalog/2 or /catalog/page/2
+        extra = next_segments[len(cur_segments):]
+        if len(extra) == 2 and extra[0].lower() not in _PAGE_WORDS:
+            return None
+        index = len(next_segments) - 1
+        next_match = _NUMBERED_SEGMENT_RE.match(next_segments[index])
+        if not next_match:
+            return None
+        step = 1 if int(next_match.group(2)) == current_page + 1 else None
+    else:
+        return None
+
+    if not step or step <= 0:
+        return None
+    return PageTemplate(base=urlunparse(nxt._replace(path='/'.join(next_segments))), kind='path',
+                        index=index, prefix=next_match.group(1), suffix=next_match.group(3),
+                        anchor_page=current_page + 1, anchor_value=int(next_match.group(2)), step=step)
+
+
+def infer_page_template(current_url: str, next_url: str, current_page: int = 1) -> Optional[PageTemplate]:
+    """
+    Work out how page numbers are encoded from the current and next page URLs.
+
+    Args:
+        current_url: URL of the page being scraped
+        next_url: URL of its next-page link
+        current_page: Page number of ``current_url``
+
+    Returns:
+        PageTemplate, or None if the pattern cannot be inferred
+    """
+    current, nxt = urlparse(current_url), urlparse(next_url)
+    if (current.scheme, current.netloc) != (nxt.scheme, nxt.netloc):
+        return None
+    if current.path.rstrip('/') == nxt.path.rstrip('/'):
+        return _query_template(current, nxt, current_page)
+    if current.query == nxt.query:
+        return _path_template(current, nxt, current_page)
+    return None
+
+
+def plan_pages(url: str, navigation: Dict[str, Any], max_pages: int | None = None) -> List[str]:
+    """
+    Generate the URLs of all remaining pages when ``total_pages`` is known.
+
+    Returns an empty list when the template cannot be inferred, in which
+    case callers fall back to following ``next_page`` one page at a time.
+    """
+    next_page = navigation.get('next_page')
+    total = _to_int(navigation.get('total_pages'))
+    current_page = _to_int(navigation.get('current_page')) or 1
+    if not next_page or not total or total <= current_page:
+        return []
+    template = infer_page_template(url, next_page, current_page)
+    if template is not None and template.step == 1:
+        # current_page defaults to 1 when the page has no current-page marker;
+        # a page-number parameter in the URL itself is more reliable (0 means zero-based)
+        value = template.value_in(url)
+        if value and value != current_page:
+            current_page = value
+            if total <= current_page:
+                return []
+            template = infer_page_template(url, next_page, current_page)
+    if template is None or not _same_url(template.url_for(current_page + 1), next_page):
+        return []
+    last = total if max_pages is None else min(total, current_page + max_pages - 1)
+    return [template.url_for(n) for n in range(current_page + 1, last + 1)]
@@ -0,0 +1,56 @@
+# scraper/rate_limit.py
+
+"""Per-domain request rate limiting for concurrent fetches."""
+import asyncio
+import weakref
+from time import monotonic
+from typing import Any, Dict
+
+
+class RateLimiter:
+    """
+    Cap concurrent requests and space request starts to a steady rate.
+
+    Use as ``async with limiter:`` around each fetch.
+    """
+
+    def __init__(self, requests_per_second: float = 2.0, max_concurrency: int = 4):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            async with self._lock:
+                now = monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+# asyncio primitives belong to one event loop, so limiters are kept per loop
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, RateLimiter]]" = weakref.WeakKeyDictionary()
+
+
+def get_rate_limiter(domain: str, config: Dict[str, Any]) -> RateLimiter:
+    """Return the shared limiter for a domain, configured from its ``rate_limit`` block."""
+    limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    limiter = limiters.get(domain)
+    if limiter is None:
+        settings = config.get("rate_limit") or {}
+        limiter = limiters[domain] = RateLimiter(
+            requests_per_second=settings.get("requests_per_second", 2.0),
+            max_concurrency=settings.get("max_concurrency", 4)
+        )
+    return limiter
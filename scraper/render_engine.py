@@ -1,14 +1,18 @@
 # scraper/render_engine.py
 
-from playwright.async_api import async_playwright
+from scraper.browser_pool import load_playwright
+from scraper.session_store import SessionStore, is_auth_redirect
+from scraper.asset_cache import AssetCache, STATIC_RESOURCE_TYPES
 import asyncio
 
 class Renderer:
-    def __init__(self):
+    def __init__(self, session: SessionStore | None = None, assets: AssetCache | None = None):
         self.browser = None
+        self.session = session
+        self.assets = assets
 
     async def load(self, url):
-        async with async_playwright() as p:
+        async with load_playwright()() as p:
             browser = await p.chromium.launch(
                 headless=True,
                 args=['--ignore-certificate-errors', '--no-sandbox']
@@ -19,7 +23,8 @@ class Renderer:
                 viewport={"width": 1280, "height": 800},
                 java_script_enabled=True,
                 bypass_csp=True,
-                ignore_https_errors=True
+                ignore_https_errors=True,
+                storage_state=self.session.load() if self.session else None
             )
             page = await context.new_page()
 
@@ -48,6 +53,11 @@ class Renderer:
                 await page.wait_for_timeout(2000)  # Wait for any dynamic content
                 
                 html = await page.content()
+                if self.session:
+                    if is_auth_redirect(page.url):
+                        self.session.invalidate(f"redirected to {page.url}")
+                    else:
+                        self.session.save(await context.storage_state())
                 return html
 
             except Exception as e:
@@ -62,7 +72,11 @@ class Renderer:
 
     async def _handle_route(self, route):
         try:
-            await route.continue_()
+            request = route.request
+            if self.assets and request.method == "GET" and request.resource_type in STATIC_RESOURCE_TYPES:
+                await self.assets.handle(route)
+            else:
+                await route.continue_()
         except Exception as e:
             print(f"Route handling error: {str(e)}")
             try:
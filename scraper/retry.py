@@ -0,0 +1,43 @@
+# scraper/retry.py
+
+"""Error classification and backoff policy for the retry queue."""
+import random
+from dataclasses import dataclass
+from typing import Dict, Any
+
+# Classification lives in utils so utils modules can share it without importing the scraper
+from utils.classify import (  # noqa: F401 - re-exported
+    classify_error, TIMEOUT, NAVIGATION, SELECTOR_MISS, RATE_LIMITED, HTTP_4XX, HTTP_5XX, UNKNOWN
+)
+
+# Client errors other than 408/425/429 will not change on retry.
+RETRYABLE = {TIMEOUT, NAVIGATION, SELECTOR_MISS, RATE_LIMITED, HTTP_5XX, UNKNOWN}
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 900.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        """Build a policy from ``retry.max_attempts``/``retry.delay`` or ``retry_attempts``."""
+        retry = config.get("retry") or {}
+        return cls(
+            max_attempts=int(retry.get("max_attempts", config.get("retry_attempts", cls.max_attempts))),
+            base_delay=float(retry.get("delay", cls.base_delay)),
+            max_delay=float(retry.get("max_delay", cls.max_delay))
+        )
+
+    def should_retry(self, error_class: str, attempts: int) -> bool:
+        """Return True if a URL that has failed ``attempts`` times should run again."""
+        return error_class in RETRYABLE and attempts < self.max_attempts
+
+    def next_delay(self, attempts: int, error_class: str | None = None) -> float:
+        """Exponential backoff with jitter, in seconds."""
+        delay = self.base_delay * (2 ** max(attempts - 1, 0))
+        if error_class == RATE_LIMITED:
+            delay *= 4
+        delay = min(delay, self.max_delay)
+        return random.uniform(delay / 2, delay)
@@ -1,16 +1,14 @@
 """Simple data schema adapters."""
 from typing import List, Dict, Any
 
+from .normalize import AuctionLot, normalize_lots
 
-def adapt_auction_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Adapt raw item dicts to a standard schema."""
-    adapted = []
-    for item in items:
-        adapted.append({
-            "title": item.get("title"),
-            "price": item.get("price"),
-            "end_time": item.get("end_time"),
-            "image": item.get("image_url"),
-            "url": item.get("item_url"),
-        })
-    return adapted
+
+def adapt_auction_items(
+    items: List[Dict[str, Any]],
+    domain: str | None = None,
+    tz=None,
+    now: float | None = None
+) -> List[AuctionLot]:
+    """Adapt raw item dicts to typed lots (price in cents, end time as UTC epoch seconds)."""
+    return normalize_lots(items, domain, tz, now).records()
@@ -10,9 +10,10 @@ DEFAULT_AUCTION_SELECTORS = [
 ]
 
 
-def generate_auction_selectors(html: str) -> List[str]:
+def generate_auction_selectors(html: str, soup: BeautifulSoup | None = None) -> List[str]:
     """Return a list of possible auction item selectors in order of likelihood."""
-    soup = BeautifulSoup(html, "html.parser")
+    if soup is None:
+        soup = BeautifulSoup(html, "html.parser")
     results: List[str] = []
     for sel in DEFAULT_AUCTION_SELECTORS:
         if soup.select_one(sel):
@@ -1,11 +1,17 @@
 """Manage selector discovery and validation."""
 from typing import List, Iterable
 
+from bs4 import BeautifulSoup
+
 from .selector_generator import generate_auction_selectors
 from .selector_validator import validate_selectors
 
 
-def get_valid_auction_selectors(html: str, custom: Iterable[str] | None = None) -> List[str]:
-    """Return validated selectors for auction items."""
-    candidates = list(custom) if custom else generate_auction_selectors(html)
-    return validate_selectors(html, candidates)
+def get_valid_auction_selectors(
+    html: str, custom: Iterable[str] | None = None, soup: BeautifulSoup | None = None
+) -> List[str]:
+    """Return validated selectors for auction items; pass ``soup`` to reuse a parsed page."""
+    if soup is None:
+        soup = BeautifulSoup(html, "html.parser")
+    candidates = list(custom) if custom else generate_auction_selectors(html, soup)
+    return validate_selectors(html, candidates, soup)
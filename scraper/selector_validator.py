@@ -3,9 +3,10 @@ from bs4 import BeautifulSoup
 from typing import Iterable, List
 
 
-def validate_selectors(html: str, selectors: Iterable[str]) -> List[str]:
-    """Return selectors that match at least one element."""
-    soup = BeautifulSoup(html, "html.parser")
+def validate_selectors(html: str, selectors: Iterable[str], soup: BeautifulSoup | None = None) -> List[str]:
+    """Return selectors that match at least one element; pass ``soup`` to reuse a parsed page."""
+    if soup is None:
+        soup = BeautifulSoup(html, "html.parser")
     valid: List[str] = []
     for sel in selectors:
         if soup.select_one(sel):
@@ -0,0 +1,389 @@
+# scraper/service.py
+
+import os
+import json
+import signal
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from time import time
+from typing import Any, Dict, List, Set
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from scraper.browser_pool import BrowserPool
+from scraper.config_manager import get_cached_config
+from scraper.core import Scraper
+from scraper.frontier import canonicalize_url
+from utils.memory import MemoryBank
+from utils.logger import Logger
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = {DONE, FAILED, CANCELLED}
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    priority: int = 0
+    crawl: bool = False
+    max_pages: int | None = None
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    pages: int = 0
+    items: int = 0
+    # Page results are stored once, here; 'result' events refer to them by index.
+    # None once the job has aged out of the service's result retention.
+    results: List[Dict[str, Any]] | None = field(default_factory=list)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'url': self.url,
+            'priority': self.priority,
+            'crawl': self.crawl,
+            'max_pages': self.max_pages,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'pages': self.pages,
+            'items': self.items
+        }
+
+
+class ScraperService:
+    """
+    Long-running scraper that takes jobs over a local HTTP API.
+
+    Jobs wait in a priority queue (lower ``priority`` runs first, FIFO
+    within a priority) and are run by a fixed set of workers that share a
+    warm browser pool, cached site configs and one memory bank and logger
+    per domain. Summaries are kept for the last ``keep_finished`` jobs and
+    page results for the last ``keep_results`` of them; results can be
+    streamed as NDJSON while a job runs.
+    """
+
+    def __init__(self, workers: int = 2, browsers: int = 4, keep_finished: int = 1000, keep_results: int = 100):
+        self.workers = workers
+        self.browsers = BrowserPool(max_contexts=browsers)
+        self.keep_finished = keep_finished
+        self.keep_results = keep_results
+        self.jobs: Dict[str, Job] = {}
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.accepting = True
+        self.started_at = time()
+        self.logger = Logger("service")
+        self._ids = itertools.count(1)
+        self._finished: deque = deque()
+        self._with_results: deque = deque()
+        self._changed = asyncio.Condition()
+        self._tasks: List[asyncio.Task] = []
+        # The loop only keeps weak references to tasks; hold notifications until they run
+        self._notifications: Set[asyncio.Task] = set()
+        self._memory: Dict[str, MemoryBank] = {}
+        self._loggers: Dict[str, Logger] = {}
+
+    async def start(self):
+        try:
+            await self.browsers.start()
+        except Exception as e:
+            # HTTP-tier jobs still work; the pool retries the launch on first browser use
+            self.logger.warning(f"Could not launch browser: {e}")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, url: str, priority: int = 0, crawl: bool = False, max_pages: int | None = None) -> Job:
+        if not self.accepting:
+            raise RuntimeError("Service is draining")
+        seq = next(self._ids)
+        job = Job(f"{seq:06d}", url, priority, crawl, max_pages)
+        self.jobs[job.id] = job
+        # The int sequence keeps FIFO order within a priority; string ids stop sorting past 999999
+        self.queue.put_nowait((priority, seq, job.id))
+        self._publish(job, 'queued')
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a job that has not started yet."""
+        if job.status != QUEUED:
+            return False
+        self._finish(job, CANCELLED)
+        return True
+
+    def _publish(self, job: Job, event: str, **payload):
+        job.events.append({'event': event, 'job': job.id, 'status': job.status, 'time': time(), **payload})
+        task = asyncio.get_running_loop().create_task(self._notify())
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _finish(self, job: Job, status: str, error: str | None = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time()
+        self._publish(job, status, error=error)
+        self._finished.append(job.id)
+        while len(self._finished) > self.keep_finished:
+            self.jobs.pop(self._finished.popleft(), None)
+        self._with_results.append(job.id)
+        while len(self._with_results) > self.keep_results:
+            old = self.jobs.get(self._with_results.popleft())
+            if old is not None:
+                old.results = None
+
+    def _domain_resources(self, url: str):
+        domain = urlparse(url).netloc
+        if domain not in self._memory:
+            retention = get_cached_config(url).get("memory") or {}
+            self._memory[domain] = MemoryBank(
+                domain,
+                max_pages=retention.get("max_pages", 10000),
+                max_failures=retention.get("max_failures", 5000),
+                max_age_days=retention.get("max_age_days"),
+                mmap_size=retention.get("mmap_size", 0)
+            )
+            self._loggers[domain] = Logger(domain)
+        return self._memory[domain], self._loggers[domain]
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self.queue.get()
+            try:
+                job = self.jobs.get(job_id)
+                if job is not None and job.status == QUEUED:
+                    await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time()
+        self._publish(job, 'started')
+
+        def on_page(url, data):
+            job.pages += 1
+            job.items += len(data.get('auction_data') or [])
+            job.results.append(data)
+            self._publish(job, 'result', url=url, index=len(job.results) - 1)
+
+        try:
+            url = job.url if job.url.startswith(('http://', 'https://')) else f'https://{job.url}'
+            url = canonicalize_url(url)
+            memory, logger = self._domain_resources(url)
+            scraper = Scraper(url, memory=memory, logger=logger,
+                              config=get_cached_config(url), browser_pool=self.browsers)
+            scraper.on_page = on_page
+            if job.crawl:
+                await scraper.crawl(job.max_pages)
+            else:
+                await scraper.run()
+        except Exception as e:
+            self.logger.error(f"Job {job.id} ({job.url}) failed: {e}")
+            self._finish(job, FAILED, str(e))
+        else:
+            self._finish(job, DONE)
+
+    def status(self) -> Dict[str, Any]:
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'accepting': self.accepting,
+            'uptime_sec': round(time() - self.started_at, 1),
+            'workers': self.workers,
+            'queued': counts.get(QUEUED, 0),
+            'running': counts.get(RUNNING, 0),
+            'jobs': counts,
+            'browser': self.browsers.stats(),
+            'domains': sorted(self._memory)
+        }
+
+    async def drain(self, timeout: float | None = None):
+        """Stop accepting jobs and wait for queued and running ones to finish."""
+        self.accepting = False
+        self.logger.info(f"Draining {self.queue.qsize()} queued job(s)")
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning("Drain timed out; cancelling remaining jobs")
+            # Cancelling finishes jobs, which can evict old ones from self.jobs
+            for job in list(self.jobs.values()):
+                if job.status == QUEUED:
+                    self.cancel(job)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in list(self.jobs.values()):
+            if job.status == RUNNING:
+                self._finish(job, FAILED, "service stopped")
+        await self.browsers.close()
+        for memory in self._memory.values():
+            memory.close()
+
+    # HTTP API
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get('/status', self._handle_status),
+            web.post('/jobs', self._handle_submit),
+            web.get('/jobs', self._handle_list),
+            web.get('/jobs/{id}', self._handle_get),
+            web.delete('/jobs/{id}', self._handle_cancel),
+            web.get('/jobs/{id}/result', self._handle_result),
+            web.get('/jobs/{id}/stream', self._handle_stream)
+        ])
+        return app
+
+    def _job(self, request) -> Job:
+        job = self.jobs.get(request.match_info['id'])
+        if job is None:
+            raise web.HTTPNotFound(text=json.dumps({'error': 'unknown job'}), content_type='application/json')
+        return job
+
+    async def _handle_status(self, request):
+        return web.json_response(self.status())
+
+    async def _handle_submit(self, request):
+        """Accept ``{"url": ...}`` or ``{"urls": [...]}`` plus optional priority, crawl and max_pages."""
+        if not self.accepting:
+            return web.json_response({'error': 'service is draining'}, status=503)
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({'error': 'body must be JSON'}, status=400)
+        try:
+            urls, priority, crawl, max_pages = self._parse_submit(body)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        jobs = [self.submit(url, priority, crawl, max_pages) for url in urls]
+        return web.json_response({'jobs': [job.summary() for job in jobs]}, status=202)
+
+    @staticmethod
+    def _parse_submit(body) -> tuple:
+        """Validate a submit body; raise ValueError with a message for the client."""
+        if not isinstance(body, dict):
+            raise ValueError('body must be a JSON object')
+        urls = body.get('urls') if 'urls' in body else ([body['url']] if body.get('url') else [])
+        if not isinstance(urls, list) or not all(isinstance(url, str) and url.strip() for url in urls):
+            raise ValueError('urls must be a list of non-empty strings')
+        if not urls:
+            raise ValueError('url or urls is required')
+        priority = body.get('priority', 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError('priority must be an integer')
+        crawl = body.get('crawl', False)
+        if not isinstance(crawl, bool):
+            raise ValueError('crawl must be true or false')
+        max_pages = body.get('max_pages')
+        if max_pages is not None and (not isinstance(max_pages, int) or isinstance(max_pages, bool) or max_pages < 1):
+            raise ValueError('max_pages must be a positive integer')
+        return [url.strip() for url in urls], priority, crawl, max_pages
+
+    async def _handle_list(self, request):
+        status = request.query.get('status')
+        jobs = [job.summary() for job in self.jobs.values() if status in (None, job.status)]
+        return web.json_response({'jobs': jobs})
+
+    async def _handle_get(self, request):
+        return web.json_response(self._job(request).summary())
+
+    async def _handle_cancel(self, request):
+        job = self._job(request)
+        if not self.cancel(job):
+            return web.json_response({'error': f'job is {job.status}'}, status=409)
+        return web.json_response(job.summary())
+
+    async def _handle_result(self, request):
+        job = self._job(request)
+        if job.status not in FINISHED:
+            return web.json_response({'error': f'job is {job.status}'}, status=409)
+        if job.results is None:
+            return web.json_response({'error': 'results have expired'}, status=410)
+        return web.json_response({**job.summary(), 'results': job.results})
+
+    async def _handle_stream(self, request):
+        """Stream a job's events (status changes and per-page results) as NDJSON until it finishes."""
+        job = self._job(request)
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        sent = 0
+        while True:
+            while sent < len(job.events):
+                event = self._expand(job, job.events[sent])
+                await response.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+                sent += 1
+            if job.status in FINISHED:
+                break
+            async with self._changed:
+                await self._changed.wait_for(lambda: sent < len(job.events))
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _expand(job: Job, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the page data a 'result' event refers to."""
+        if event['event'] != 'result':
+            return event
+        event = dict(event)
+        index = event.pop('index')
+        if job.results is None:
+            event['expired'] = True
+        else:
+            event['data'] = job.results[index]
+        return event
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8700, socket_path: str | None = None,
+                workers: int = 2, browsers: int = 4, drain_timeout: float | None = None):
+    """
+    Run the scraper service until SIGINT/SIGTERM, then drain and exit.
+
+    Args:
+        host: TCP address to bind when no socket path is given
+        port: TCP port
+        socket_path: Unix socket to listen on instead of TCP
+        workers: Jobs run concurrently
+        browsers: Browser contexts open at once in the shared pool
+        drain_timeout: Seconds to wait for in-flight jobs on shutdown (None waits for all)
+    """
+    service = ScraperService(workers=workers, browsers=browsers)
+    await service.start()
+    runner = web.AppRunner(service.app())
+    await runner.setup()
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        site = web.UnixSite(runner, socket_path)
+    else:
+        site = web.TCPSite(runner, host, port)
+    await site.start()
+    service.logger.info(f"Scraper service listening on {socket_path or f'http://{host}:{port}'}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+        await service.drain(drain_timeout)
+    finally:
+        await runner.cleanup()
+        await service.close()
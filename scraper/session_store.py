@@ -0,0 +1,127 @@
+# scraper/session_store.py
+
+import os
+import re
+import json
+import logging
+from time import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Status codes that mean the stored session is no longer accepted
+AUTH_FAILURE_STATUSES = {401, 403, 407}
+
+_AUTH_PATH_RE = re.compile(r'/(?:login|log-in|signin|sign-in|auth|consent|cookie-consent)(?:[/?#.]|$)', re.IGNORECASE)
+
+
+def is_auth_redirect(url: str) -> bool:
+    """Return True if a navigation ended on a login or consent page."""
+    return bool(_AUTH_PATH_RE.search(url or ""))
+
+
+class SessionStore:
+    """
+    Per-domain persisted browser storage state (cookies and localStorage).
+
+    The state uses Playwright's ``storage_state`` layout so it can be passed
+    straight to ``browser.new_context``; its cookies are also exposed as an
+    httpx cookie jar so browser and HTTP fetches share one session.
+    """
+
+    def __init__(self, domain: str, ttl: float = 86400):
+        self.domain = domain.replace("www.", "")
+        self.path = os.path.join("memory", self.domain, "storage_state.json")
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._state: Optional[Dict[str, Any]] = None
+        self._saved_at = 0.0
+        self._loaded = False
+        # Bumped on every save/invalidate so HTTP clients can resync cookies
+        self.version = 0
+
+    def _read(self):
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        self._state = stored.get("state")
+        self._saved_at = stored.get("saved_at", 0.0)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the storage state, or None if there is none or it has expired."""
+        if not self._loaded:
+            self._read()
+        if self._state is None:
+            return None
+        if time() - self._saved_at > self.ttl:
+            self.invalidate("expired")
+            return None
+        now = time()
+        return {
+            "cookies": [c for c in self._state.get("cookies", [])
+                        if c.get("expires", -1) in (-1, None) or c["expires"] > now],
+            "origins": self._state.get("origins", [])
+        }
+
+    def save(self, state: Dict[str, Any]):
+        """Persist a storage state captured after a successful page load."""
+        self._state = state
+        self._saved_at = time()
+        self._loaded = True
+        self.version += 1
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": self._saved_at, "state": state}, f, indent=2)
+
+    def invalidate(self, reason: str = ""):
+        """Drop the stored state, e.g. after an auth or consent failure."""
+        if self._state is not None or os.path.exists(self.path):
+            self.logger.info(f"Invalidating session state for {self.domain}: {reason}")
+        self._state = None
+        self._loaded = True
+        self.version += 1
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def httpx_cookies(self) -> httpx.Cookies:
+        """Return the stored cookies as an httpx cookie jar."""
+        cookies = httpx.Cookies()
+        state = self.load() or {}
+        for c in state.get("cookies", []):
+            cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+        return cookies
+
+    def merge_cookies(self, jar: httpx.Cookies):
+        """Fold cookies set on HTTP responses back into the stored state."""
+        state = self.load() or {"cookies": [], "origins": []}
+        merged: Dict[tuple, Dict[str, Any]] = {
+            (c["name"], c.get("domain"), c.get("path")): c for c in state["cookies"]
+        }
+        changed = False
+        for c in jar.jar:
+            cookie = {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path or "/",
+                "expires": c.expires if c.expires is not None else -1,
+                "httpOnly": c.has_nonstandard_attr("HttpOnly"),
+                "secure": bool(c.secure),
+                "sameSite": "Lax"
+            }
+            key = (cookie["name"], cookie["domain"], cookie["path"])
+            if merged.get(key, {}).get("value") != cookie["value"]:
+                merged[key] = cookie
+                changed = True
+        if changed:
+            self.save({"cookies": list(merged.values()), "origins": state["origins"]})
+
+    def cookies(self) -> List[Dict[str, Any]]:
+        return (self.load() or {}).get("cookies", [])
@@ -0,0 +1,221 @@
+# scraper/structured_data.py
+
+"""Single-pass JSON-LD, microdata and RDFa extraction."""
+import json
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import Tag
+
+# Elements whose microdata/RDFa value comes from a URL attribute
+_URL_ATTRS = {
+    'a': 'href', 'area': 'href', 'link': 'href',
+    'audio': 'src', 'embed': 'src', 'iframe': 'src', 'img': 'src',
+    'source': 'src', 'track': 'src', 'video': 'src',
+    'object': 'data'
+}
+
+PRODUCT_TYPES = {'Product', 'IndividualProduct', 'ProductModel', 'Vehicle'}
+OFFER_TYPES = {'Offer', 'AggregateOffer'}
+
+
+def _short_type(value) -> List[str]:
+    """Reduce schema types ("https://schema.org/Product", "schema:Offer") to bare names."""
+    values = value if isinstance(value, list) else str(value or '').split()
+    return [str(v).rstrip('/').split('/')[-1].split(':')[-1].split('#')[-1] for v in values if v]
+
+
+def _add(properties: Dict[str, Any], name: str, value: Any):
+    # Repeated properties become lists instead of overwriting each other
+    for key in name.split():
+        if key in properties:
+            existing = properties[key]
+            if isinstance(existing, list):
+                existing.append(value)
+            else:
+                properties[key] = [existing, value]
+        else:
+            properties[key] = value
+
+
+class StructuredDataParser:
+    """
+    Walk a parsed document once and collect every JSON-LD block (with
+    ``@graph`` flattened), nested microdata items and RDFa resources.
+    """
+
+    def __init__(self, soup, url: str):
+        self.soup = soup
+        self.url = url
+        self.json_ld: List[Any] = []
+        self.microdata: List[Dict[str, Any]] = []
+        self.rdfa: List[Dict[str, Any]] = []
+
+    def parse(self) -> Dict[str, List[Any]]:
+        self._walk(self.soup, None, None, None)
+        return {'json-ld': self.json_ld, 'microdata': self.microdata, 'rdfa': self.rdfa}
+
+    def _value(self, el: Tag, content_attrs=('content',)) -> Optional[str]:
+        for attr in content_attrs:
+            if el.has_attr(attr):
+                return el[attr]
+        url_attr = _URL_ATTRS.get(el.name)
+        if url_attr and el.has_attr(url_attr):
+            return urljoin(self.url, el[url_attr])
+        if el.name in ('data', 'meter') and el.has_attr('value'):
+            return el['value']
+        if el.name == 'time' and el.has_attr('datetime'):
+            return el['datetime']
+        return el.get_text(' ', strip=True)
+
+    def _walk(self, root, micro: Optional[Dict], rdfa: Optional[Dict], vocab: Optional[str]):
+        # Explicit stack of child iterators: document order, every element visited
+        # once, and no recursion limit on deeply nested markup
+        stack = [(iter(root.children), micro, rdfa, vocab)]
+        while stack:
+            children, micro, rdfa, vocab = stack[-1]
+            el = next(children, None)
+            if el is None:
+                stack.pop()
+                continue
+            if not isinstance(el, Tag):
+                continue
+
+            if el.name == 'script':
+                if (el.get('type') or '').split(';')[0].strip().lower() == 'application/ld+json':
+                    self._add_json_ld(el.string or el.get_text())
+                continue
+
+            child_micro, child_rdfa, child_vocab = micro, rdfa, el.get('vocab', vocab)
+
+            # Microdata
+            itemprop = el.get('itemprop')
+            if el.has_attr('itemscope'):
+                item = {'type': el.get('itemtype'), 'properties': {}}
+                if el.get('itemid'):
+                    item['id'] = el['itemid']
+                if itemprop and micro is not None:
+                    _add(micro['properties'], itemprop, item)
+                else:
+                    self.microdata.append(item)
+                child_micro = item
+            elif itemprop and micro is not None:
+                _add(micro['properties'], itemprop, self._value(el))
+
+            # RDFa (Lite)
+            prop = el.get('property')
+            typeof = el.get('typeof')
+            if typeof is not None:
+                resource = {'type': [f"{child_vocab or ''}{t}" for t in typeof.split()], 'properties': {}}
+                if el.get('resource'):
+                    resource['id'] = el['resource']
+                if prop and rdfa is not None:
+                    _add(rdfa['properties'], prop, resource)
+                else:
+                    self.rdfa.append(resource)
+                child_rdfa = resource
+            elif prop and rdfa is not None:
+                _add(rdfa['properties'], prop, self._value(el, ('content', 'resource')))
+
+            stack.append((iter(el.children), child_micro, child_rdfa, child_vocab))
+
+    def _add_json_ld(self, text: Optional[str]):
+        try:
+            data = json.loads(text or '')
+        except (json.JSONDecodeError, TypeError):
+            return
+        for block in data if isinstance(data, list) else [data]:
+            if isinstance(block, dict) and '@graph' in block:
+                graph = block['@graph']
+                self.json_ld.extend(graph if isinstance(graph, list) else [graph])
+            else:
+                self.json_ld.append(block)
+
+
+def extract_structured_data(soup, url: str) -> Dict[str, List[Any]]:
+    """Return ``{'json-ld': [...], 'microdata': [...], 'rdfa': [...]}`` for a document."""
+    return StructuredDataParser(soup, url).parse()
+
+
+def _as_node(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Give microdata/RDFa items the JSON-LD shape (``@type`` plus properties)."""
+    if 'properties' in item and 'type' in item:
+        node = {'@type': _short_type(item['type'])}
+        for key, value in item['properties'].items():
+            values = value if isinstance(value, list) else [value]
+            converted = [_as_node(v) if isinstance(v, dict) else v for v in values]
+            node[key] = converted if isinstance(value, list) else converted[0]
+        return node
+    return item
+
+
+def _iter_nodes(value) -> Iterator[Dict[str, Any]]:
+    # Depth-first in document order, without recursing
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            yield value
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+
+
+def _types(node: Dict[str, Any]) -> set:
+    return set(_short_type(node.get('@type')))
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _text(value) -> Optional[str]:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl') or value.get('name') or value.get('@id')
+    return str(value).strip() if value not in (None, '') else None
+
+
+def _lot_from_product(product: Dict[str, Any], base_url: str, source: str) -> Dict[str, Any]:
+    offer = _first(product.get('offers')) or {}
+    if not isinstance(offer, dict):
+        offer = {}
+    price = _text(offer.get('price') or offer.get('lowPrice') or offer.get('highPrice') or product.get('price'))
+    currency = _text(offer.get('priceCurrency') or product.get('priceCurrency'))
+    image = _text(product.get('image'))
+    url = _text(product.get('url') or offer.get('url'))
+    return {
+        'title': _text(product.get('name')),
+        'price': f"{currency} {price}" if price and currency else price,
+        'end_time': _text(offer.get('availabilityEnds') or offer.get('priceValidUntil') or offer.get('validThrough')),
+        'image_url': urljoin(base_url, image) if image else None,
+        'item_url': urljoin(base_url, url) if url else None,
+        'selector': f"structured-data:{source}"
+    }
+
+
+def lots_from_structured_data(structured: Dict[str, List[Any]], base_url: str) -> List[Dict[str, Any]]:
+    """
+    Map ``Product`` items (and ``Offer`` items wrapping one via
+    ``itemOffered``) to records with the same keys as
+    Extractor._extract_item_data.
+    """
+    lots: List[Dict[str, Any]] = []
+    seen = set()
+    for source in ('json-ld', 'microdata', 'rdfa'):
+        for item in structured.get(source, []):
+            for node in _iter_nodes(_as_node(item) if isinstance(item, dict) else item):
+                types = _types(node)
+                if types & OFFER_TYPES and isinstance(_first(node.get('itemOffered')), dict):
+                    product = dict(_first(node['itemOffered']))
+                    product.setdefault('offers', node)
+                elif types & PRODUCT_TYPES:
+                    product = node
+                else:
+                    continue
+                lot = _lot_from_product(product, base_url, source)
+                key = (lot['title'], lot['item_url'])
+                if lot['title'] and (lot['price'] or lot['item_url']) and key not in seen:
+                    seen.add(key)
+                    lots.append(lot)
+    return lots
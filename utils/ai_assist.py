@@ -1,38 +1,281 @@
 # utils/ai_assist.py
 
 import os
+import re
 import yaml
-from dotenv import load_dotenv
-from openai import OpenAI
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from time import time
+from urllib.parse import urlparse
+from utils.classify import classify_error, page_template
 from utils.logger import Logger
 
-load_dotenv()
+DEFAULT_CACHE_PATH = os.path.join("memory", "_ai", "cache.db")
+DEFAULT_CACHE_TTL = 7 * 86400
+
+_STRIP_BLOCKS = re.compile(r'<(script|style|noscript|svg|template|iframe)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+_STRIP_COMMENTS = re.compile(r'<!--.*?-->', re.S)
+_STRIP_HEAD = re.compile(r'<head\b[^>]*>.*?</head\s*>', re.S | re.I)
+_TITLE = re.compile(r'<title\b[^>]*>(.*?)</title\s*>', re.S | re.I)
+_NOISY_ATTRS = re.compile(
+    r'\s(?:style|on\w+|srcset|sizes|integrity|crossorigin|nonce|referrerpolicy|loading|decoding)'
+    r'\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)', re.I
+)
+_LONG_ATTRS = re.compile(r'(\s[\w:-]+=")([^"]{120})[^"]+"')
+_TAG = re.compile(r'<([a-zA-Z][\w-]*)([^>]*)>')
+_CLASS = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.I)
+
+# Config files are parsed once per process (and again only if they change)
+_configs = {}
+_dotenv_loaded = False
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Calls in flight across all assistants in the process, by cache key
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _load_dotenv():
+    """Read .env once, on the first assistant rather than at import; python-dotenv is optional."""
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def _load_config(path):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _configs.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = _configs[path] = (mtime, yaml.safe_load(f) or {})
+    return cached[1]
+
+
+def minify_html(html, limit=None):
+    """
+    Shrink HTML for a prompt: drop scripts, styles, comments, <head> (keeping
+    the title), presentation-only attributes and redundant whitespace.
+
+    Args:
+        html: Raw page HTML
+        limit: Maximum characters to return
+
+    Returns:
+        Minified HTML, cut to ``limit`` characters
+    """
+    title = _TITLE.search(html)
+    html = _STRIP_COMMENTS.sub('', html)
+    html = _STRIP_BLOCKS.sub('', html)
+    html = _STRIP_HEAD.sub('', html)
+    html = _NOISY_ATTRS.sub('', html)
+    html = _LONG_ATTRS.sub(r'\1\2…"', html)
+    html = re.sub(r'\s+', ' ', html)
+    html = re.sub(r'>\s+<', '><', html).strip()
+    if title:
+        html = f"<title>{title.group(1).strip()}</title>{html}"
+    return html[:limit] if limit else html
+
+
+def template_fingerprint(html, url=""):
+    """
+    Fingerprint a page's template rather than its content.
+
+    Pages rendered from the same template share the same set of tag/class
+    tokens regardless of how many lots they list or what the lots say, so
+    the fingerprint is the hash of that set (digits in class names are
+    ignored) plus the URL's path template.
+    """
+    tokens = set()
+    for tag, attrs in _TAG.findall(html):
+        classes = _CLASS.search(attrs)
+        names = sorted(re.sub(r'\d+', '#', c) for c in classes.group(1).split()) if classes else []
+        tokens.add(f"{tag.lower()}.{'.'.join(names)}")
+    source = page_template(url) + "\n" + "\n".join(sorted(tokens))
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+def error_class(error):
+    """Error class for a cache key: the retry classification of an exception or message."""
+    return classify_error(error if isinstance(error, BaseException) else Exception(str(error)))
+
+
+class AIResponseCache:
+    """
+    Disk-backed cache of AI responses with a TTL, shared by all domains.
+
+    Entries live in an SQLite file so they survive restarts and can be
+    read by several worker processes at once.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                template TEXT NOT NULL,
+                error_class TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+        self._lock = threading.Lock()
+        # Expired entries are never read again; drop them whenever a cache is opened
+        self.prune()
+
+    def get(self, key, count=True):
+        with self._lock:
+            row = self.db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        hit = row is not None and (not self.ttl or time() - row[1] < self.ttl)
+        if count:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if hit else None
+
+    def put(self, key, kind, domain, template, error_class, response):
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, kind, domain, template, error_class, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, domain, template, error_class, response, time())
+            )
+            self.db.commit()
+
+    def prune(self):
+        """Drop expired entries; return how many were removed."""
+        if not self.ttl:
+            return 0
+        with self._lock:
+            removed = self.db.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time() - self.ttl,)
+            ).rowcount
+            self.db.commit()
+        return removed
+
 
 class AIAssistant:
-    def __init__(self, config_path="config.yaml"):
-        self.config = self._load_config(config_path)
+    """
+    OpenAI-backed fallback for pages the scraper cannot handle.
+
+    Responses are cached by domain, page-template fingerprint and error
+    class, so a crawl over thousands of pages from one template pays for
+    one call. Concurrent identical requests (from threads, or from the
+    async wrappers) wait for a single in-flight call instead of each
+    making their own. Pass ``client`` (anything with the OpenAI
+    ``chat.completions.create`` interface) or set ``openai_base_url`` /
+    ``OPENAI_BASE_URL`` to point at a local stub server.
+    """
+
+    def __init__(self, config_path="config.yaml", client=None, base_url=None, cache=None):
+        _load_dotenv()
+        self.config = _load_config(config_path)
         self.enabled = self.config.get("use_openai_fallback", False)
         self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or self.config.get("openai_base_url") or os.getenv("OPENAI_BASE_URL")
         self.model = self.config.get("openai_model", "gpt-4")
         self.max_tokens = self.config.get("gpt_response_limit", 500)
+        self.prompt_chars = self.config.get("gpt_prompt_chars", 6000)
         self.logger = Logger("global")
 
-        if self.enabled and not self.api_key:
+        if self.enabled and not self.api_key and client is None and not self.base_url:
             raise ValueError("OpenAI fallback enabled but OPENAI_API_KEY not found.")
 
-        self.client = OpenAI(api_key=self.api_key)
+        self._client = client
+        self.cache = cache if cache is not None else AIResponseCache(
+            self.config.get("ai_cache_path", DEFAULT_CACHE_PATH),
+            self.config.get("ai_cache_ttl", DEFAULT_CACHE_TTL)
+        )
+        self.calls = 0
+        self.coalesced = 0
 
-    def _load_config(self, path):
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
-        return {}
+    @property
+    def client(self):
+        """OpenAI client, created on first use and shared by assistants with the same endpoint."""
+        if self._client is None:
+            key = (self.api_key, self.base_url)
+            with _clients_lock:
+                if key not in _clients:
+                    try:
+                        from openai import OpenAI
+                    except ImportError as e:
+                        raise RuntimeError("OpenAI fallback needs the openai package: pip install openai") from e
+                    _clients[key] = OpenAI(api_key=self.api_key or "unused", base_url=self.base_url)
+                self._client = _clients[key]
+        return self._client
+
+    def _cached_call(self, kind, url, html, error, build_messages, temperature, failure_text):
+        domain = (urlparse(url).netloc or url).replace("www.", "")
+        template = template_fingerprint(html, url)
+        err_class = error_class(error) if error is not None else None
+        key = hashlib.sha1(f"{kind}|{self.model}|{domain}|{template}|{err_class}".encode("utf-8")).hexdigest()
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with _inflight_lock:
+            pending = _inflight.get(key)
+            if pending is None:
+                pending = _inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            self.coalesced += 1
+            return pending.result()
+
+        result = failure_text
+        try:
+            # Another caller may have finished between the cache check and taking ownership
+            result = self.cache.get(key, count=False)
+            if result is not None:
+                return result
+            self.calls += 1
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=build_messages(minify_html(html, self.prompt_chars)),
+                temperature=temperature,
+                max_tokens=self.max_tokens
+            )
+            result = response.choices[0].message.content
+            self.cache.put(key, kind, domain, template, err_class, result)
+        except Exception as e:
+            self.logger.log_error(f"AI {kind} failed", str(e))
+            result = failure_text
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            pending.set_result(result)
+        return result
 
     def summarize_page(self, html, url):
         if not self.enabled:
             return "[OpenAI fallback disabled by config]"
 
-        prompt = f"""
+        def messages(snippet):
+            prompt = f"""
 You are an expert AI web scraper. Analyze the following HTML content from {url}.
 Return:
 - What is the purpose of this page?
@@ -40,47 +283,50 @@ Return:
 - Recommend CSS selectors or data types for title, price, description, or main content.
 
 HTML:
-{html[:5000]}
+{snippet}
 """
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a precise and efficient web analysis assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.4,
-                max_tokens=self.max_tokens
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            self.logger.log_error("AI summary failed", str(e))
-            return "[AI summary error]"
+            return [
+                {"role": "system", "content": "You are a precise and efficient web analysis assistant."},
+                {"role": "user", "content": prompt}
+            ]
+
+        return self._cached_call("summary", url, html, None, messages, 0.4, "[AI summary error]")
 
     def suggest_fix(self, error, html, url):
         if not self.enabled:
             return "[OpenAI fallback disabled by config]"
 
-        prompt = f"""
+        def messages(snippet):
+            prompt = f"""
 You're debugging a failed web scrape from {url}. The error message was:
 "{error}"
 
 Here's the HTML snippet involved:
-{html[:4000]}
+{snippet}
 
 Suggest a reason for the failure and a potential fix (e.g. wait condition, alt selector, new render step).
 """
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You're an expert web scraping debugger."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=self.max_tokens
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            self.logger.log_error("AI suggestion failed", str(e))
-            return "[AI suggestion error]"
+            return [
+                {"role": "system", "content": "You're an expert web scraping debugger."},
+                {"role": "user", "content": prompt}
+            ]
+
+        return self._cached_call("fix", url, html, error, messages, 0.5, "[AI suggestion error]")
+
+    async def asummarize_page(self, html, url):
+        """summarize_page without blocking the event loop."""
+        import asyncio  # only async callers pay for it
+        return await asyncio.to_thread(self.summarize_page, html, url)
+
+    async def asuggest_fix(self, error, html, url):
+        """suggest_fix without blocking the event loop."""
+        import asyncio
+        return await asyncio.to_thread(self.suggest_fix, error, html, url)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses
+        }
@@ -0,0 +1,56 @@
+# utils/classify.py
+
+"""
+Page-template and error classification shared by the scraper and utils.
+
+Only the standard library is imported here, so utils modules can use it
+without pulling in the scraper package or its HTTP stack.
+"""
+import re
+import sys
+from urllib.parse import urlparse, parse_qsl
+
+TIMEOUT = "timeout"
+NAVIGATION = "navigation"
+SELECTOR_MISS = "selector_miss"
+RATE_LIMITED = "rate_limited"
+HTTP_4XX = "http_4xx"
+HTTP_5XX = "http_5xx"
+UNKNOWN = "unknown"
+
+_ID_SEGMENT_RE = re.compile(r'^(?:\d+|[0-9a-f]{8,}|[0-9a-f-]{32,36})$', re.IGNORECASE)
+
+
+def page_template(url: str) -> str:
+    """Reduce a URL to its page template, e.g. ``/lots/*?page``."""
+    parsed = urlparse(url)
+    segments = ['*' if _ID_SEGMENT_RE.match(s) else s for s in parsed.path.split('/')]
+    template = '/'.join(segments) or '/'
+    keys = sorted({k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return f"{template}?{'&'.join(keys)}" if keys else template
+
+
+def classify_error(exc: BaseException) -> str:
+    """Map an exception raised during a scrape to an error class."""
+    # An httpx exception can only exist if httpx has been imported already
+    httpx = sys.modules.get("httpx")
+
+    # FetchError and Playwright/aiohttp errors carry the HTTP status as .status
+    status = getattr(exc, "status", None)
+    if httpx is not None and isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    if isinstance(status, int):
+        if status in (408, 425, 429):
+            return RATE_LIMITED
+        return HTTP_5XX if status >= 500 else HTTP_4XX
+
+    # asyncio's (before 3.11) and Playwright's TimeoutError are not builtin subclasses; match on name
+    if isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__:
+        return TIMEOUT
+    message = str(exc)
+    if "Timeout" in message and "exceeded" in message:
+        return TIMEOUT
+    if (httpx is not None and isinstance(exc, httpx.TransportError)) \
+            or "net::ERR_" in message or "Page.goto" in message:
+        return NAVIGATION
+    return UNKNOWN
@@ -29,6 +29,9 @@ class Logger:
     def info(self, msg: str):
         self.logger.info(msg)
 
+    def warning(self, msg: str):
+        self.logger.warning(msg)
+
     def error(self, msg: str):
         self.logger.error(msg)
 
@@ -2,75 +2,375 @@
 
 import os
 import json
+import sqlite3
+import threading
+from functools import wraps
+from time import time
 from urllib.parse import urlparse
 from datetime import datetime
 
+def _locked(method):
+    """Serialize a MemoryBank method: the bank is shared with worker threads."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_created_at ON pages (created_at);
+
+CREATE TABLE IF NOT EXISTS failures (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    error_type TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS failures_created_at ON failures (created_at);
+
+CREATE TABLE IF NOT EXISTS selectors (
+    field TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (field, selector)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS retry_queue (
+    url TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    error_type TEXT,
+    last_error TEXT,
+    queued_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retry_queue_due ON retry_queue (next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS details (
+    url TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class PagedRecords:
+    """Read-only, lazily paged view over a JSON-valued table."""
+
+    def __init__(self, bank, table, columns, page_size=500):
+        self.bank = bank
+        self.table = table
+        self.columns = columns
+        self.page_size = page_size
+
+    def _row(self, row):
+        if self.columns == ("data",):
+            return json.loads(row[0])
+        return dict(zip(self.columns, row))
+
+    def __len__(self):
+        with self.bank._lock:
+            return self.bank.db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        rows = self.page(index, 1)
+        if not rows:
+            raise IndexError(index)
+        return rows[0]
+
+    def page(self, offset=0, limit=100):
+        cols = ", ".join(self.columns)
+        with self.bank._lock:
+            rows = self.bank.db.execute(
+                f"SELECT {cols} FROM {self.table} ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def __iter__(self):
+        # Keyset pagination keeps each page an index seek, whatever the depth
+        cols = ", ".join(self.columns)
+        last_id = 0
+        while True:
+            with self.bank._lock:
+                rows = self.bank.db.execute(
+                    f"SELECT id, {cols} FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, self.page_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row(row[1:])
+            last_id = rows[-1][0]
+
+
 class MemoryBank:
-    def __init__(self, domain):
-        self.domain = urlparse(domain).netloc.replace("www.", "")
+    """
+    Per-domain memory stored in ``memory/<domain>/memory.db`` (SQLite).
+
+    Nothing is read at construction time: the database is opened on first
+    use and history is exposed through paged views, so startup cost and RSS
+    no longer grow with the domain's history. Retention limits are applied
+    every ``compact_every`` writes.
+    """
+
+    def __init__(self, domain, max_pages=10000, max_failures=5000, max_age_days=None,
+                 mmap_size=0, compact_every=500):
+        self.domain = (urlparse(domain).netloc or domain).replace("www.", "")
         self.dir = os.path.join("memory", self.domain)
         os.makedirs(self.dir, exist_ok=True)
 
+        self.db_file = os.path.join(self.dir, "memory.db")
         self.data_file = os.path.join(self.dir, "extracted_data.json")
         self.fail_file = os.path.join(self.dir, "error_history.json")
         self.pattern_file = os.path.join(self.dir, "learned_selectors.json")
         self.metadata_file = os.path.join(self.dir, "metadata.json")
 
-        # Load or initialize memory structures
-        self.data = self._load_json(self.data_file, [])
-        self.failures = self._load_json(self.fail_file, [])
-        self.patterns = self._load_json(self.pattern_file, {})
-        self.metadata = self._load_json(self.metadata_file, {
-            "last_scraped": None,
-            "retry_queue": [],
-            "successful_pages": 0,
-            "failed_pages": 0
-        })
+        self.max_pages = max_pages
+        self.max_failures = max_failures
+        self.max_age_days = max_age_days
+        self.mmap_size = mmap_size
+        self.compact_every = compact_every
+        self._writes = 0
+        self._db = None
+        self._lock = threading.RLock()
+
+        self.data = PagedRecords(self, "pages", ("data",))
+        self.failures = PagedRecords(self, "failures", ("timestamp", "error_type", "message"))
+
+    @property
+    @_locked
+    def db(self):
+        if self._db is None:
+            fresh = not os.path.exists(self.db_file)
+            self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            if self.mmap_size:
+                # Serve reads from a memory-mapped view of the file
+                self._db.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._db.executescript(SCHEMA)
+            if fresh:
+                self._import_json()
+        return self._db
 
     def _load_json(self, path, default):
         if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                pass
         return default
 
-    def _save_json(self, path, data):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    def _import_json(self):
+        """One-time import of the JSON files written by earlier versions."""
+        now = time()
+        data = self._load_json(self.data_file, [])
+        for page in data if isinstance(data, list) else [data]:
+            self.db.execute("INSERT INTO pages (created_at, data) VALUES (?, ?)", (now, json.dumps(page)))
 
+        for record in self._load_json(self.fail_file, []):
+            self.db.execute(
+                "INSERT INTO failures (created_at, timestamp, error_type, message) VALUES (?, ?, ?, ?)",
+                (now, record.get("timestamp", ""), record.get("error_type"),
+                 record.get("message", record.get("error")))
+            )
+
+        for field, selectors in self._load_json(self.pattern_file, {}).items():
+            for position, selector in enumerate(selectors):
+                self.db.execute("INSERT OR IGNORE INTO selectors VALUES (?, ?, ?)", (field, selector, position))
+
+        metadata = self._load_json(self.metadata_file, {})
+        for key in ("last_scraped", "successful_pages", "failed_pages"):
+            if key in metadata:
+                self._set_meta(key, metadata[key])
+        queue = metadata.get("retry_queue") or []
+        for url in queue:
+            entry = queue[url] if isinstance(queue, dict) else {}
+            self.db.execute(
+                "INSERT OR IGNORE INTO retry_queue VALUES (?, ?, ?, ?, ?, ?)",
+                (url, entry.get("attempts", 0), entry.get("next_attempt_at", now), entry.get("error_type"),
+                 entry.get("last_error"), entry.get("queued_at", datetime.utcnow().isoformat()))
+            )
+        self.db.commit()
+
+    def _get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _incr_meta(self, key):
+        self._set_meta(key, self._get_meta(key, 0) + 1)
+
+    def _wrote(self):
+        self.db.commit()
+        self._writes += 1
+        if self.compact_every and self._writes % self.compact_every == 0:
+            self.compact()
+
+    @property
+    @_locked
+    def patterns(self):
+        patterns = {}
+        for field, selector in self.db.execute("SELECT field, selector FROM selectors ORDER BY field, position"):
+            patterns.setdefault(field, []).append(selector)
+        return patterns
+
+    @property
+    @_locked
+    def metadata(self):
+        return {
+            "last_scraped": self._get_meta("last_scraped"),
+            "retry_queue": self.get_retry_queue(),
+            "successful_pages": self._get_meta("successful_pages", 0),
+            "failed_pages": self._get_meta("failed_pages", 0)
+        }
+
+    @_locked
     def save_data(self, page_data):
-        self.data.append(page_data)
-        self.metadata["successful_pages"] += 1
-        self.metadata["last_scraped"] = datetime.utcnow().isoformat()
-        self._save_json(self.data_file, self.data)
-        self._save_json(self.metadata_file, self.metadata)
+        self.db.execute("INSERT INTO pages (created_at, data) VALUES (?, ?)", (time(), json.dumps(page_data)))
+        self._incr_meta("successful_pages")
+        self._set_meta("last_scraped", datetime.utcnow().isoformat())
+        self._wrote()
 
+    @_locked
     def save_failure(self, error_type, error_message):
-        record = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "error_type": error_type,
-            "message": error_message
-        }
-        self.failures.append(record)
-        self.metadata["failed_pages"] += 1
-        self._save_json(self.fail_file, self.failures)
-        self._save_json(self.metadata_file, self.metadata)
+        self.db.execute(
+            "INSERT INTO failures (created_at, timestamp, error_type, message) VALUES (?, ?, ?, ?)",
+            (time(), datetime.utcnow().isoformat(), error_type, error_message)
+        )
+        self._incr_meta("failed_pages")
+        self._wrote()
 
+    @_locked
     def learn_selector(self, field, selector):
-        if field not in self.patterns:
-            self.patterns[field] = []
-        if selector not in self.patterns[field]:
-            self.patterns[field].append(selector)
-        self._save_json(self.pattern_file, self.patterns)
+        self.db.execute(
+            "INSERT OR IGNORE INTO selectors SELECT ?, ?, COUNT(*) FROM selectors WHERE field = ?",
+            (field, selector, field)
+        )
+        self.db.commit()
+
+    def iter_data(self, page_size=500):
+        """Yield stored page records oldest first, ``page_size`` rows at a time."""
+        return iter(PagedRecords(self, "pages", ("data",), page_size))
+
+    @_locked
+    def get_data(self, offset=0, limit=100):
+        """Return one page of stored page records."""
+        return self.data.page(offset, limit)
+
+    @_locked
+    def compact(self, vacuum=False):
+        """Apply retention limits to stored pages and failures."""
+        if self.max_age_days:
+            cutoff = time() - self.max_age_days * 86400
+            self.db.execute("DELETE FROM pages WHERE created_at < ?", (cutoff,))
+            self.db.execute("DELETE FROM failures WHERE created_at < ?", (cutoff,))
+        for table, limit in (("pages", self.max_pages), ("failures", self.max_failures)):
+            if limit:
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE id <= "
+                    f"(SELECT id FROM {table} ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (limit,)
+                )
+        self.db.commit()
+        if vacuum:
+            self.db.execute("VACUUM")
+
+    @_locked
+    def save_detail(self, url, detail):
+        self.db.execute("INSERT OR REPLACE INTO details VALUES (?, ?, ?)", (url, time(), json.dumps(detail)))
+        self.db.commit()
 
-    def queue_retry(self, url):
-        if url not in self.metadata["retry_queue"]:
-            self.metadata["retry_queue"].append(url)
-            self._save_json(self.metadata_file, self.metadata)
+    @_locked
+    def get_details(self, urls, max_age=None):
+        """Return stored detail records for the given URLs, keyed by URL."""
+        found = {}
+        urls = list(urls)
+        cutoff = time() - max_age if max_age else 0
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            for url, data in self.db.execute(
+                f"SELECT url, data FROM details WHERE url IN ({marks}) AND fetched_at >= ?", (*chunk, cutoff)
+            ):
+                found[url] = json.loads(data)
+        return found
 
+    @_locked
+    def queue_retry(self, url, error_type=None, delay=0, attempts=None, last_error=None):
+        entry = self.get_retry(url)
+        if entry is None:
+            self.db.execute(
+                "INSERT INTO retry_queue VALUES (?, ?, ?, ?, ?, ?)",
+                (url, attempts or 0, time() + delay, error_type, last_error, datetime.utcnow().isoformat())
+            )
+        elif attempts is None and error_type is None:
+            return
+        else:
+            self.db.execute(
+                "UPDATE retry_queue SET next_attempt_at = ?, attempts = ?, error_type = ?, last_error = ? "
+                "WHERE url = ?",
+                (time() + delay,
+                 entry["attempts"] if attempts is None else attempts,
+                 entry["error_type"] if error_type is None else error_type,
+                 entry["last_error"] if error_type is None else last_error,
+                 url)
+            )
+        self.db.commit()
+
+    @_locked
     def get_retry_queue(self):
-        return self.metadata.get("retry_queue", [])
+        return [url for (url,) in self.db.execute("SELECT url FROM retry_queue ORDER BY next_attempt_at")]
+
+    @_locked
+    def get_retry(self, url):
+        row = self.db.execute(
+            "SELECT url, attempts, next_attempt_at, error_type, last_error, queued_at "
+            "FROM retry_queue WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("url", "attempts", "next_attempt_at", "error_type", "last_error", "queued_at"), row))
+
+    @_locked
+    def due_retries(self, now=None):
+        """Return queued URLs whose backoff has elapsed, earliest first."""
+        now = time() if now is None else now
+        return [url for (url,) in self.db.execute(
+            "SELECT url FROM retry_queue WHERE next_attempt_at <= ? ORDER BY next_attempt_at", (now,)
+        )]
 
+    @_locked
+    def next_retry_at(self):
+        """Return the earliest scheduled retry time, or None if the queue is empty."""
+        return self.db.execute("SELECT MIN(next_attempt_at) FROM retry_queue").fetchone()[0]
+
+    @_locked
     def dequeue_retry(self, url):
-        if url in self.metadata["retry_queue"]:
-            self.metadata["retry_queue"].remove(url)
-            self._save_json(self.metadata_file, self.metadata)
+        self.db.execute("DELETE FROM retry_queue WHERE url = ?", (url,))
+        self.db.commit()
+
+    @_locked
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None